@@ -4,6 +4,8 @@ from models import db
 from routes import main
 from config import Config
 from database import init_database
+from ollama_client import warm_up_in_background, start_health_checks
+from cli import register_commands
 
 def create_app():
     """Create and configure the Flask application"""
@@ -18,6 +20,7 @@ def create_app():
 
     # Register blueprints
     app.register_blueprint(main)
+    register_commands(app)
 
     # Initialize database with sample data
     with app.app_context():
@@ -27,6 +30,8 @@ def create_app():
 
 if __name__ == '__main__':
     app = create_app()
+    warm_up_in_background()
+    start_health_checks()
     print("🚀 Starting Elyx Healthcare Dashboard...")
     print("📊 Dashboard available at: http://localhost:5000")
     print("🔧 API endpoints available at: http://localhost:5000/api/")
@@ -0,0 +1,386 @@
+"""Micro-benchmarks for the conversation pipeline.
+
+Usage:
+    python benchmarks.py parser [--lines 1000000] [--compare]
+    python benchmarks.py categorizer [--messages 1000000]
+    python benchmarks.py prompt-eval [--rounds 3] [--base-url http://localhost:11434]
+    python benchmarks.py e2e [--members 1 10 1000] [--latency 0] [--tokens-per-second 0] [--stream]
+    python benchmarks.py wearables [--members 1000] [--days 243] [--samples-per-day 1]
+    python benchmarks.py output-formats [--members 10] [--base-url http://localhost:11434]
+    python benchmarks.py search [--messages 1000000] [--queries 20]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from dateutil.parser import parse as dateutil_parse
+from flask import Flask
+
+from config import Config
+from conversation_generator import ElyxConversationGenerator
+from database import init_database, create_synthetic_members
+from message_categorizer import MessageCategorizer
+from models import db, Member
+from ollama_stub import start_stub_server
+from wearable_series import generate_series, load_health_metrics
+from conversation_search import search_conversations, search_conversations_like
+from generation_metrics import summarize_calls
+
+CORPUS_SENDERS = [
+    'Rohan Patel', 'Rohan', 'Ruby (Concierge)', 'Ruby', 'Dr. Warren (Medical)',
+    'Advik (Performance)', 'Carla', 'Rachel (PT)', 'Neel (Lead)', 'Dr. Evans', 'Sarah Tan'
+]
+
+CORPUS_MESSAGES = [
+    "My Garmin is logging high intensity minutes even on rest days.",
+    "Your HRV dropped to 32ms overnight, recovery is at 41%.",
+    "Let's keep the Zone 2 cardio at 25 minutes this week.",
+    "I've updated the supplement list, magnesium threonate before bed.",
+    "Flight to Jakarta moved to Thursday, travel protocol attached.",
+    "Can we schedule the appointment with the cardiologist for Monday?",
+    "Thanks, that makes sense. I'll try it tonight.",
+    "This is urgent - resting heart rate up 12bpm since yesterday.",
+]
+
+CORPUS_NOISE = [
+    "",
+    "Here are the conversations for Month 3:",
+    "---",
+    "**Week 2**",
+]
+
+
+def build_corpus(lines: int, seed: int = 42) -> str:
+    """Synthetic WhatsApp transcript, roughly 1 in 10 lines being LLM chatter"""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(lines):
+        if rng.random() < 0.1:
+            out.append(rng.choice(CORPUS_NOISE))
+            continue
+        hour = rng.randint(1, 12)
+        out.append(
+            f"[{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/25, {hour}:{rng.randint(0, 59):02d} "
+            f"{rng.choice(['AM', 'PM'])}] {rng.choice(CORPUS_SENDERS)}: {rng.choice(CORPUS_MESSAGES)}"
+        )
+    return '\n'.join(out)
+
+
+def legacy_parse(generator: ElyxConversationGenerator, response: str, month: int = None):
+    """The original find/split parser plus the dateutil pass the save path used to do"""
+    conversations = []
+    for line in response.split('\n'):
+        line = line.strip()
+        if line.startswith('[') and ']' in line and ':' in line:
+            try:
+                end_bracket = line.find(']')
+                timestamp_str = line[1:end_bracket].strip()
+                if ',' in timestamp_str:
+                    date_part, time_part = timestamp_str.split(', ')
+                    if '/' in date_part and len(date_part.split('/')) == 3:
+                        day, month_num, year = date_part.split('/')
+                        full_timestamp = f"20{year}-{month_num.zfill(2)}-{day.zfill(2)} {time_part}"
+                    else:
+                        full_timestamp = timestamp_str
+                else:
+                    full_timestamp = timestamp_str
+
+                remainder = line[end_bracket + 1:].strip()
+                if ':' in remainder:
+                    colon_pos = remainder.find(':')
+                    sender = remainder[:colon_pos].strip()
+                    message = remainder[colon_pos + 1:].strip()
+                    if '(' in sender and ')' in sender:
+                        sender = sender.split('(')[0].strip()
+                    display_sender = generator.sender_mapping.get(sender, sender)
+                    conversations.append({
+                        'timestamp': dateutil_parse(full_timestamp),
+                        'sender': display_sender,
+                        'sender_role': generator.get_sender_role(display_sender),
+                        'message': message,
+                        'category': generator.categorize_message(message, display_sender),
+                        'month': month or 1
+                    })
+            except Exception:
+                continue
+    return conversations
+
+
+def legacy_categorize(message: str, sender: str) -> str:
+    """The original if/elif keyword ladder"""
+    message_lower = message.lower()
+
+    if any(word in message_lower for word in ['emergency', 'urgent', 'critical', 'immediately']):
+        return 'emergency'
+    elif any(word in message_lower for word in ['data', 'hrv', 'whoop', 'recovery', 'sleep']):
+        return 'data_analysis'
+    elif any(word in message_lower for word in ['exercise', 'zone 2', 'workout', 'cardio']):
+        return 'exercise'
+    elif any(word in message_lower for word in ['nutrition', 'food', 'supplement', 'cgm']):
+        return 'nutrition'
+    elif any(word in message_lower for word in ['travel', 'trip', 'flight', 'protocol']):
+        return 'travel'
+    elif any(word in message_lower for word in ['schedule', 'appointment', 'calendar']):
+        return 'scheduling'
+    elif sender == 'Rohan Patel':
+        return 'member_inquiry'
+    else:
+        return 'team_response'
+
+
+def build_messages(count: int, seed: int = 42):
+    """Mix of corpus messages and keyword-free chatter, with their senders"""
+    rng = random.Random(seed)
+    filler = ("thanks for the update we will check in tomorrow morning "
+              "sounds good let me know how it goes this week").split()
+    messages, senders = [], []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            messages.append(rng.choice(CORPUS_MESSAGES))
+        else:
+            messages.append(' '.join(rng.choice(filler) for _ in range(rng.randint(5, 30))))
+        senders.append(rng.choice(['Rohan Patel', 'Ruby', 'Advik']))
+    return messages, senders
+
+
+def report(label: str, lines: int, records: int, seconds: float):
+    print(f"{label:<10} {lines:>10,} lines  {records:>10,} records  "
+          f"{seconds:8.2f}s  {lines / seconds:>12,.0f} lines/s")
+
+
+def bench_parser(args):
+    generator = ElyxConversationGenerator(use_cache=False)
+    corpus = build_corpus(args.lines)
+    print(f"Parsing {args.lines:,} lines ({len(corpus) / 1e6:.1f} MB)")
+
+    started = time.perf_counter()
+    records = generator.parse_ollama_response(corpus, 1)
+    report('compiled', args.lines, len(records), time.perf_counter() - started)
+
+    if args.compare:
+        started = time.perf_counter()
+        legacy_records = legacy_parse(generator, corpus, 1)
+        report('legacy', args.lines, len(legacy_records), time.perf_counter() - started)
+
+
+def bench_categorizer(args):
+    categorizer = MessageCategorizer()
+    messages, senders = build_messages(args.messages)
+    print(f"Categorizing {args.messages:,} messages")
+
+    started = time.perf_counter()
+    legacy = [legacy_categorize(message, sender) for message, sender in zip(messages, senders)]
+    report_rate('legacy', args.messages, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    single = [categorizer.categorize(message, sender) for message, sender in zip(messages, senders)]
+    report_rate('single', args.messages, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    batch = categorizer.categorize_batch(messages, senders)
+    report_rate('batch', args.messages, time.perf_counter() - started)
+
+    if not legacy == single == batch:
+        raise SystemExit("Categorizer results differ from the original implementation")
+
+
+def report_rate(label: str, count: int, seconds: float, unit: str = 'messages'):
+    print(f"{label:<10} {seconds:8.2f}s  {count / seconds:>12,.0f} {unit}/s")
+
+
+def bench_prompt_eval(args):
+    """Prompt evaluation cost per scenario call, system prompt inline vs in the system field"""
+    for mode in ('inline', 'system'):
+        generator = ElyxConversationGenerator(base_url=args.base_url, use_cache=False, system_prompt_mode=mode)
+        prompts = [scenario['build_prompt']() for scenario in generator.get_scenarios()]
+        generator.client.warm_up(generator.model)
+        for _ in range(args.rounds):
+            for prompt in prompts:
+                prompt, fields = generator.get_request(prompt)
+                # One output token is enough to measure the prompt side
+                result = generator.client.generate(generator.model, prompt, options={'num_predict': 1}, **fields)
+                generator.record_prompt_eval(result)
+
+        stats = generator.prompt_eval_stats
+        print(f"{mode:<10} {stats['calls']:>4} calls  {stats['tokens'] / stats['calls']:>8.0f} prompt tokens/call  "
+              f"{stats['seconds'] / stats['calls'] * 1000:>8.1f} ms prompt eval/call")
+
+
+def build_benchmark_app(database_path: str) -> Flask:
+    """App bound to a scratch SQLite database seeded like a fresh install"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
+    db.init_app(app)
+    with app.app_context():
+        init_database()
+    return app
+
+
+def bench_e2e(args):
+    """Full generate_full_dataset runs against the local Ollama stub"""
+    stub = start_stub_server(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                             messages=args.messages_per_response)
+    print(f"Ollama stub at {stub.base_url}: {args.latency}s latency, "
+          f"{args.tokens_per_second or 'unlimited'} tokens/s, {args.messages_per_response} messages per response")
+    print(f"{'members':>8} {'messages':>10} {'wall':>9} {'msg/s':>9} {'parse':>8} {'categorize':>11} "
+          f"{'db write':>9} {'other':>9}")
+
+    for members in args.members:
+        with tempfile.TemporaryDirectory() as directory:
+            with contextlib.redirect_stdout(io.StringIO()):
+                app = build_benchmark_app(os.path.join(directory, 'bench.db'))
+            with app.app_context():
+                create_synthetic_members(members - Member.query.count())
+                member_ids = [member_id for (member_id,) in db.session.query(Member.id).order_by(Member.id)]
+                generator = ElyxConversationGenerator(base_url=stub.base_url, use_cache=False)
+
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    messages = sum(generator.generate_full_dataset(member_id, stream=args.stream)
+                                   for member_id in member_ids)
+                wall = time.perf_counter() - started
+
+            parse = generator.stage_seconds['parse']
+            categorize = generator.stage_seconds['categorize']
+            save = generator.save_stats['seconds']
+            print(f"{members:>8,} {messages:>10,} {wall:>8.2f}s {messages / wall:>9,.0f} {parse:>7.2f}s "
+                  f"{categorize:>10.2f}s {save:>8.2f}s {wall - parse - categorize - save:>8.2f}s")
+    stub.shutdown()
+
+
+def bench_output_formats(args):
+    """Parse yield and tokens per stored message, text lines vs JSON output"""
+    stub = None
+    base_url = args.base_url
+    if base_url is None:
+        stub = start_stub_server(messages=args.messages_per_response)
+        base_url = stub.base_url
+    print(f"Generating for {args.members} members per format against {base_url}")
+    print(f"{'format':<8} {'calls':>6} {'tokens':>9} {'parsed':>8} {'rejected':>9} {'stored':>8} "
+          f"{'msg/1k tok':>11} {'tok/stored':>11}")
+
+    for output_format in ('text', 'json'):
+        with tempfile.TemporaryDirectory() as directory:
+            with contextlib.redirect_stdout(io.StringIO()):
+                app = build_benchmark_app(os.path.join(directory, 'bench.db'))
+            with app.app_context():
+                create_synthetic_members(args.members - Member.query.count())
+                member_ids = [member_id for (member_id,) in db.session.query(Member.id).order_by(Member.id)]
+                generator = ElyxConversationGenerator(base_url=base_url, use_cache=False,
+                                                      output_format=output_format)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for member_id in member_ids:
+                        generator.generate_full_dataset(member_id, stream=False)
+                summary, = summarize_calls('output_format')
+
+        print(f"{output_format:<8} {summary['calls']:>6,} {summary['eval_tokens']:>9,} "
+              f"{summary['messages_parsed']:>8,} {generator.parser.rejected:>9,} {summary['messages_saved']:>8,} "
+              f"{summary['messages_per_1k_tokens'] or 0:>11.2f} {summary['tokens_per_stored_message'] or 0:>11.1f}")
+    if stub is not None:
+        stub.shutdown()
+
+
+def bench_wearables(args):
+    """Vectorized wearable series generation and bulk load into health_metrics"""
+    with tempfile.TemporaryDirectory() as directory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = build_benchmark_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            create_synthetic_members(args.members - Member.query.count())
+            member_ids = [member_id for (member_id,) in db.session.query(Member.id).order_by(Member.id)]
+
+            started = time.perf_counter()
+            series = generate_series(len(member_ids), days=args.days, samples_per_day=args.samples_per_day, seed=42)
+            generated = time.perf_counter()
+            rows = load_health_metrics(series, member_ids, replace=True)
+            loaded = time.perf_counter()
+
+    print(f"{rows:,} rows for {len(member_ids):,} members")
+    report_rate('generate', rows, generated - started, 'rows')
+    report_rate('load', rows, loaded - generated, 'rows')
+
+
+def bench_search(args):
+    """FTS5 search against the LIKE scan it replaces, over a large conversations table"""
+    messages, senders = build_messages(args.messages)
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as directory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = build_benchmark_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            started = time.perf_counter()
+            cursor = db.session.connection().connection.cursor()
+            cursor.executemany(
+                "INSERT INTO conversations (member_id, sender, message, category, timestamp, month, content_hash) "
+                "VALUES (?, ?, ?, 'general', ?, 1, ?)",
+                ((1 + i % 100, sender, message, f"2025-01-01 00:{i % 60:02d}:00.000000", str(i))
+                 for i, (message, sender) in enumerate(zip(messages, senders))))
+            db.session.commit()
+            report_rate('index', args.messages, time.perf_counter() - started, 'rows')
+
+            words = [word for message in CORPUS_MESSAGES for word in message.lower().split() if len(word) > 4]
+            queries = [' '.join(rng.sample(words, rng.randint(1, 2)))[:rng.randint(4, 12)] for _ in range(args.queries)]
+            for label, search in (('fts5', search_conversations), ('like', search_conversations_like)):
+                started = time.perf_counter()
+                found = sum(len(search(query, limit=50)) for query in queries)
+                seconds = time.perf_counter() - started
+                print(f"{label:<10} {args.queries} queries  {found:>6,} results  "
+                      f"{seconds / args.queries * 1000:8.1f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    parser_bench = subparsers.add_parser('parser', help='WhatsApp line parser throughput')
+    parser_bench.add_argument('--lines', type=int, default=1_000_000)
+    parser_bench.add_argument('--compare', action='store_true',
+                              help='also time the original find/split + dateutil parser')
+    parser_bench.set_defaults(func=bench_parser)
+
+    categorizer_bench = subparsers.add_parser('categorizer', help='keyword categorizer throughput')
+    categorizer_bench.add_argument('--messages', type=int, default=1_000_000)
+    categorizer_bench.set_defaults(func=bench_categorizer)
+
+    prompt_eval_bench = subparsers.add_parser('prompt-eval',
+                                              help='Ollama prompt evaluation time, inline vs system-field system prompt')
+    prompt_eval_bench.add_argument('--rounds', type=int, default=3)
+    prompt_eval_bench.add_argument('--base-url', default=None, help='Ollama server (default OLLAMA_BASE_URL)')
+    prompt_eval_bench.set_defaults(func=bench_prompt_eval)
+
+    e2e_bench = subparsers.add_parser('e2e', help='end-to-end generation against the local Ollama stub')
+    e2e_bench.add_argument('--members', type=int, nargs='+', default=[1, 10, 1000])
+    e2e_bench.add_argument('--latency', type=float, default=0.0, help='stub seconds before the first token')
+    e2e_bench.add_argument('--tokens-per-second', type=float, default=0.0, help='stub generation speed, 0 = unlimited')
+    e2e_bench.add_argument('--messages-per-response', type=int, default=15)
+    e2e_bench.add_argument('--stream', action='store_true', help='stream responses instead of one call per scenario')
+    e2e_bench.set_defaults(func=bench_e2e)
+
+    wearables_bench = subparsers.add_parser('wearables', help='synthetic wearable series generation and bulk load')
+    wearables_bench.add_argument('--members', type=int, default=1000)
+    wearables_bench.add_argument('--days', type=int, default=243)
+    wearables_bench.add_argument('--samples-per-day', type=int, default=1)
+    wearables_bench.set_defaults(func=bench_wearables)
+
+    formats_bench = subparsers.add_parser('output-formats', help='text vs JSON generation yield')
+    formats_bench.add_argument('--members', type=int, default=10)
+    formats_bench.add_argument('--messages-per-response', type=int, default=15)
+    formats_bench.add_argument('--base-url', default=None, help='real Ollama server (default: local stub)')
+    formats_bench.set_defaults(func=bench_output_formats)
+
+    search_bench = subparsers.add_parser('search', help='FTS5 vs LIKE conversation search')
+    search_bench.add_argument('--messages', type=int, default=1_000_000)
+    search_bench.add_argument('--queries', type=int, default=20)
+    search_bench.set_defaults(func=bench_search)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
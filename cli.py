@@ -0,0 +1,193 @@
+import multiprocessing
+
+import click
+from flask.cli import AppGroup
+
+generation_cli = AppGroup('generation', help='Durable conversation generation queue.')
+wearables_cli = AppGroup('wearables', help='Synthetic wearable health metrics.')
+checks_cli = AppGroup('checks', help='Database access regression checks.')
+stats_cli = AppGroup('stats', help='Per-member dashboard statistics.')
+
+
+@generation_cli.command('enqueue')
+@click.option('--member-id', type=int, help='Queue every scenario for this member.')
+@click.option('--all-members', is_flag=True, help='Queue every scenario for every member.')
+def enqueue_command(member_id, all_members):
+    """Queue member x scenario generation tasks"""
+    from generation_queue import enqueue_member, enqueue_all_members
+
+    if all_members:
+        created = enqueue_all_members()
+    elif member_id is not None:
+        created = enqueue_member(member_id)
+    else:
+        raise click.UsageError('Pass --member-id or --all-members')
+    print(f"📥 Queued {created} generation tasks")
+
+
+@generation_cli.command('worker')
+@click.option('--workers', type=int, default=1, show_default=True, help='Worker processes to start.')
+@click.option('--ollama-url', 'ollama_urls', multiple=True,
+              help='Ollama endpoint; repeat to spread workers round-robin across hosts.')
+@click.option('--lease-seconds', type=int, default=None, help='Task lease length (GENERATION_LEASE_SECONDS).')
+@click.option('--poll-interval', type=float, default=5.0, show_default=True)
+@click.option('--exit-when-empty', is_flag=True, help='Stop once no runnable task is left.')
+def worker_command(workers, ollama_urls, lease_seconds, poll_interval, exit_when_empty):
+    """Run generation workers until interrupted"""
+    options = dict(lease_seconds=lease_seconds, poll_interval=poll_interval, exit_when_empty=exit_when_empty)
+    if workers <= 1:
+        _run_worker(ollama_urls[0] if ollama_urls else None, options)
+        return
+
+    # Spawned children build their own app, engine and Ollama sessions
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=_run_worker,
+                        args=(ollama_urls[i % len(ollama_urls)] if ollama_urls else None, options),
+                        name=f'elyx-generation-worker-{i}')
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"👷 Started {workers} generation workers")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+@generation_cli.command('status')
+def status_command():
+    """Show task counts by status"""
+    from generation_queue import queue_status
+
+    counts = queue_status()
+    if not counts:
+        print("📭 Generation queue is empty")
+        return
+    for status in ('pending', 'running', 'completed', 'failed'):
+        print(f"{status:<10} {counts.get(status, 0):>6}")
+
+
+def _run_worker(base_url, options):
+    from app import create_app
+    from generation_queue import GenerationWorker
+
+    worker = GenerationWorker(create_app(), base_url=base_url,
+                              lease_seconds=options['lease_seconds'],
+                              poll_interval=options['poll_interval'])
+    try:
+        worker.run(exit_when_empty=options['exit_when_empty'])
+    except KeyboardInterrupt:
+        pass
+
+
+@wearables_cli.command('seed')
+@click.option('--member-id', 'member_ids', type=int, multiple=True, help='Member to seed; repeatable.')
+@click.option('--all-members', is_flag=True, help='Seed every member.')
+@click.option('--create-members', type=int, default=0, help='First add this many synthetic members.')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default='2025-01-01', show_default=True)
+@click.option('--days', type=int, default=243, show_default=True)
+@click.option('--samples-per-day', type=int, default=1, show_default=True)
+@click.option('--random-illness', type=float, default=0.0, show_default=True,
+              help='Mean extra illness episodes per member on top of the May setback.')
+@click.option('--seed', type=int, default=None, help='Random seed for repeatable data.')
+@click.option('--keep-existing', is_flag=True, help="Add to members' existing metrics instead of replacing them.")
+def wearables_seed_command(member_ids, all_members, create_members, start, days, samples_per_day,
+                           random_illness, seed, keep_existing):
+    """Bulk-load daily or intra-day HRV, recovery and resting heart rate"""
+    from database import create_synthetic_members
+    from models import db, Member
+    from wearable_series import seed_wearable_data
+
+    if create_members:
+        first_new_id = (db.session.query(db.func.max(Member.id)).scalar() or 0) + 1
+        create_synthetic_members(create_members)
+        print(f"👥 Added {create_members} synthetic members")
+        if not member_ids and not all_members:
+            member_ids = [member_id for (member_id,) in db.session.query(Member.id)
+                          .filter(Member.id >= first_new_id).order_by(Member.id)]
+    if all_members:
+        member_ids = [member_id for (member_id,) in db.session.query(Member.id).order_by(Member.id)]
+    if not member_ids:
+        raise click.UsageError('Pass --member-id, --all-members or --create-members')
+
+    seed_wearable_data(list(member_ids), start.date(), days, samples_per_day,
+                       replace=not keep_existing, random_illness_per_member=random_illness, seed=seed)
+
+
+@checks_cli.command('query-count')
+@click.option('--member-id', type=int, default=1, show_default=True)
+@click.option('--limit', type=int, default=500, show_default=True, help='Page size to request.')
+@click.option('--max-queries', type=int, default=2, show_default=True)
+def query_count_command(member_id, limit, max_queries):
+    """Fail when a member's conversation page takes more than --max-queries queries"""
+    from flask import current_app
+    from query_checks import QueryCheckError, count_page_queries
+
+    try:
+        messages, statements = count_page_queries(current_app.test_client(), member_id, limit)
+    except QueryCheckError as e:
+        raise click.ClickException(str(e))
+    print(f"🔎 /api/conversations/{member_id}: {messages} messages in {len(statements)} queries")
+    if len(statements) > max_queries:
+        for statement in statements[:max_queries + 3]:
+            print(f"   {' '.join(statement.split())[:160]}")
+        raise click.ClickException(f"{len(statements)} queries, expected at most {max_queries}")
+
+
+@checks_cli.command('query-plans')
+@click.option('--member-id', type=int, default=1, show_default=True)
+@click.option('--verbose', is_flag=True, help='Print every plan, not just failing ones.')
+def query_plans_command(member_id, verbose):
+    """Fail when an endpoint or seed-data query scans a table or sorts in a temp B-tree
+
+    Runs every endpoint in query_checks.QUERY_PLAN_ENDPOINTS plus
+    init_database's existence checks, captures their SELECTs and runs
+    EXPLAIN QUERY PLAN on each. A full scan, of the table or of an index,
+    is only accepted for queries without a WHERE clause, which read the
+    whole table by design.
+    """
+    from flask import current_app
+    from query_checks import QUERY_PLAN_ENDPOINTS, QueryCheckError, check_query_plans
+
+    try:
+        results = check_query_plans(current_app.test_client(), member_id)
+    except QueryCheckError as e:
+        raise click.ClickException(str(e))
+
+    failures = 0
+    for result in results:
+        failures += bool(result['problems'])
+        if result['problems'] or verbose:
+            print(f"{'❌' if result['problems'] else '✅'} {result['source']}: "
+                  f"{' '.join(result['statement'].split())[:160]}")
+            for step in result['plan']:
+                print(f"   {step}")
+    print(f"🔎 Checked {len(results)} queries from {len(QUERY_PLAN_ENDPOINTS)} endpoints and init_database")
+    if failures:
+        raise click.ClickException(f"{failures} queries scan a table or sort in a temp B-tree")
+
+
+@stats_cli.command('rebuild')
+@click.option('--member-id', 'member_ids', type=int, multiple=True, help='Member to rebuild; repeatable. Default: all.')
+def stats_rebuild_command(member_ids):
+    """Recompute member_stats from conversations, timeline events and decisions"""
+    from member_stats import rebuild_member_stats, refresh_member_stats
+    from models import db
+
+    if member_ids:
+        refreshed = refresh_member_stats(member_ids)
+        db.session.commit()
+    else:
+        refreshed = rebuild_member_stats()
+    print(f"📊 Rebuilt stats for {refreshed} members")
+
+
+def register_commands(app):
+    app.cli.add_command(generation_cli)
+    app.cli.add_command(wearables_cli)
+    app.cli.add_command(checks_cli)
+    app.cli.add_command(stats_cli)
@@ -3,6 +3,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'elyx-healthcare-secret-key-2025'
 
@@ -13,6 +15,76 @@ class Config:
     # Ollama configuration
     OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL') or 'http://localhost:11434'
     OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL') or 'llama3.1:8b'
+    OLLAMA_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT') or 5)
+    OLLAMA_READ_TIMEOUT = float(os.environ.get('OLLAMA_READ_TIMEOUT') or 600)
+    OLLAMA_MAX_RETRIES = int(os.environ.get('OLLAMA_MAX_RETRIES') or 3)
+    OLLAMA_RETRY_BACKOFF = float(os.environ.get('OLLAMA_RETRY_BACKOFF') or 1.0)
+    OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE') or 10)
+    OLLAMA_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('OLLAMA_CIRCUIT_FAILURE_THRESHOLD') or 3)
+    OLLAMA_CIRCUIT_RESET_TIMEOUT = float(os.environ.get('OLLAMA_CIRCUIT_RESET_TIMEOUT') or 30)
+    OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE') or '30m'
+    OLLAMA_WARMUP = (os.environ.get('OLLAMA_WARMUP') or 'true').lower() in ('1', 'true', 'yes')
+    # 'system' sends the fixed system prompt in Ollama's system field, 'inline' prepends it to each prompt
+    OLLAMA_SYSTEM_PROMPT_MODE = os.environ.get('OLLAMA_SYSTEM_PROMPT_MODE') or 'system'
+
+    # Several Ollama servers, comma separated; defaults to OLLAMA_BASE_URL alone
+    OLLAMA_BASE_URLS = [url.strip() for url in (os.environ.get('OLLAMA_BASE_URLS') or OLLAMA_BASE_URL).split(',')
+                        if url.strip()]
+    OLLAMA_EJECT_SECONDS = float(os.environ.get('OLLAMA_EJECT_SECONDS') or 30)
+    OLLAMA_STALL_TIMEOUT = float(os.environ.get('OLLAMA_STALL_TIMEOUT') or 120)
+    OLLAMA_HEALTH_CHECK_INTERVAL = float(os.environ.get('OLLAMA_HEALTH_CHECK_INTERVAL') or 15)
+    # A call whose load_duration exceeds this counts as a cold model load in generation metrics
+    OLLAMA_COLD_LOAD_SECONDS = float(os.environ.get('OLLAMA_COLD_LOAD_SECONDS') or 1.0)
+
+    # LLM response cache configuration
+    LLM_CACHE_ENABLED = (os.environ.get('LLM_CACHE_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH') or os.path.join(basedir, 'instance', 'llm_cache.db')
+    LLM_CACHE_MAX_BYTES = int(os.environ.get('LLM_CACHE_MAX_BYTES') or 256 * 1024 * 1024)
+
+    # Generation configuration
+    GENERATION_CONCURRENCY = int(os.environ.get('GENERATION_CONCURRENCY') or 3)
+    # Adjust concurrency between 1 and GENERATION_MAX_CONCURRENCY from Ollama latency and errors
+    GENERATION_ADAPTIVE_CONCURRENCY = (os.environ.get('GENERATION_ADAPTIVE_CONCURRENCY') or 'true').lower() in ('1', 'true', 'yes')
+    GENERATION_MAX_CONCURRENCY = int(os.environ.get('GENERATION_MAX_CONCURRENCY') or 16)
+    GENERATION_STREAMING = (os.environ.get('GENERATION_STREAMING') or 'true').lower() in ('1', 'true', 'yes')
+    GENERATION_STREAM_BATCH_SIZE = int(os.environ.get('GENERATION_STREAM_BATCH_SIZE') or 5)
+    # 'text' asks for WhatsApp-format lines, 'json' for schema-constrained JSON messages (never streamed)
+    GENERATION_OUTPUT_FORMAT = os.environ.get('GENERATION_OUTPUT_FORMAT') or 'text'
+    # Follow-up requests for the missing messages when a scenario parses short of its range
+    GENERATION_MAX_TOP_UPS = int(os.environ.get('GENERATION_MAX_TOP_UPS') or 2)
+    GENERATION_TOP_UP_CONTEXT_MESSAGES = int(os.environ.get('GENERATION_TOP_UP_CONTEXT_MESSAGES') or 6)
+    # num_predict budget per requested top-up message
+    GENERATION_TOKENS_PER_MESSAGE = int(os.environ.get('GENERATION_TOKENS_PER_MESSAGE') or 80)
+    # Per-scenario model routing, looked up by scenario key and then by kind
+    # ('onboarding', 'progress', 'setback'). A route with a fallback switches to
+    # it for the rest of the scenario once the primary misses its latency budget.
+    GENERATION_MODEL_ROUTING = (os.environ.get('GENERATION_MODEL_ROUTING') or 'false').lower() in ('1', 'true', 'yes')
+    OLLAMA_SMALL_MODEL = os.environ.get('OLLAMA_SMALL_MODEL') or 'llama3.2:3b'
+    GENERATION_MODEL_ROUTES = {
+        'onboarding': {'model': OLLAMA_MODEL, 'latency_budget': 120, 'fallback': OLLAMA_SMALL_MODEL},
+        'setback': {'model': OLLAMA_MODEL, 'latency_budget': 120, 'fallback': OLLAMA_SMALL_MODEL},
+        'progress': {'model': OLLAMA_SMALL_MODEL, 'latency_budget': None, 'fallback': None},
+    }
+    GENERATION_LEASE_SECONDS = int(os.environ.get('GENERATION_LEASE_SECONDS') or 120)
+    GENERATION_MAX_ATTEMPTS = int(os.environ.get('GENERATION_MAX_ATTEMPTS') or 3)
+
+    # Conversation API pages
+    CONVERSATIONS_PAGE_SIZE = int(os.environ.get('CONVERSATIONS_PAGE_SIZE') or 100)
+    CONVERSATIONS_MAX_PAGE_SIZE = int(os.environ.get('CONVERSATIONS_MAX_PAGE_SIZE') or 500)
+
+    # Full-text search scores at most this many of the newest matches
+    SEARCH_RANK_CANDIDATES = int(os.environ.get('SEARCH_RANK_CANDIDATES') or 1000)
+
+    # Message categorization: first category with a keyword in the message wins
+    MESSAGE_CATEGORY_RULES_FILE = os.environ.get('MESSAGE_CATEGORY_RULES_FILE')
+    MESSAGE_CATEGORY_RULES = [
+        ('emergency', ['emergency', 'urgent', 'critical', 'immediately']),
+        ('data_analysis', ['data', 'hrv', 'whoop', 'recovery', 'sleep']),
+        ('exercise', ['exercise', 'zone 2', 'workout', 'cardio']),
+        ('nutrition', ['nutrition', 'food', 'supplement', 'cgm']),
+        ('travel', ['travel', 'trip', 'flight', 'protocol']),
+        ('scheduling', ['schedule', 'appointment', 'calendar'])
+    ]
 
     # Member configuration
     MEMBER_NAME = "Rohan Patel"
@@ -1,17 +1,61 @@
-import requests
+import hashlib
 import json
 import subprocess
 import datetime
 import random
-from typing import List, Dict
-from models import db, Member, TeamMember, Conversation, TimelineEvent, HealthMetric, Decision, TeamMetric
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from models import db, Member, TeamMember, Conversation, TimelineEvent, HealthMetric, Decision, TeamMetric, GenerationCheckpoint, OllamaCallStat
 from config import Config
-from dateutil.parser import parse
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from generation_scheduler import GenerationScheduler, get_concurrency_limiter
+from ollama_client import OllamaDeadlineError, get_ollama_client
+from llm_cache import get_llm_cache
+from message_parser import MESSAGES_JSON_SCHEMA, WhatsAppLineParser, parse_timestamp
+from message_categorizer import MessageCategorizer
+from member_stats import add_conversations, refresh_member_stats, unseen_team_members
+from scenario_run import ScenarioRun
+
+TEXT_FORMAT_INSTRUCTIONS = """CRITICAL FORMATTING - Use EXACT format:
+[DD/MM/YY, HH:MM AM/PM] Sender: Message text here
+[15/01/25, 2:15 PM] Rohan Patel: My Garmin is logging consistently high intensity minutes...
+[15/01/25, 2:38 PM] Ruby: Hi Rohan, thank you for sharing this..."""
+
+JSON_FORMAT_INSTRUCTIONS = """CRITICAL FORMATTING - Respond with JSON only:
+{"messages": [{"timestamp": "YYYY-MM-DD HH:MM", "sender": "Sender", "message": "Message text here"}]}
+{"timestamp": "2025-01-15 14:15", "sender": "Rohan Patel", "message": "My Garmin is logging consistently high intensity minutes..."}
+{"timestamp": "2025-01-15 14:38", "sender": "Ruby", "message": "Hi Rohan, thank you for sharing this..."}"""
+
+JSON_OUTPUT_REMINDER = """
+
+Return every message as an object in the "messages" JSON array; any line format shown above only illustrates content."""
 
 class ElyxConversationGenerator:
-    def __init__(self, model="llama3.1:8b"):
-        self.model = model
-        self.base_url = Config.OLLAMA_BASE_URL
+    def __init__(self, model=None, base_url=None, use_cache=None, system_prompt_mode=None,
+                 output_format=None):
+        self.model = model or Config.OLLAMA_MODEL
+        # An explicit model is used for every scenario
+        self.model_routing = Config.GENERATION_MODEL_ROUTING and model is None
+        self.client = get_ollama_client(base_url)
+        self.base_url = self.client.base_url
+        self.use_cache = Config.LLM_CACHE_ENABLED if use_cache is None else use_cache
+        self.cache = get_llm_cache() if self.use_cache else None
+        self._roster = None
+        self._member_names = {}
+        # Team members known to have conversations with each member, so
+        # saves only look up the ones they haven't seen before
+        self._member_team_members = {}
+        self.save_stats = {'rows': 0, 'duplicates': 0, 'seconds': 0.0}
+        self.system_prompt_mode = system_prompt_mode or Config.OLLAMA_SYSTEM_PROMPT_MODE
+        self.output_format = output_format or Config.GENERATION_OUTPUT_FORMAT
+        self.prompt_eval_stats = {'calls': 0, 'tokens': 0, 'seconds': 0.0}
+        self.stage_seconds = {'parse': 0.0, 'categorize': 0.0}
+        self._stats_lock = threading.Lock()
+        # Final Ollama response of the last call made on each thread, for call stats
+        self._last_response = threading.local()
         self.member_name = "Rohan Patel"
 
         # ✅ FIXED: Don't convert member name to database format for display
@@ -33,37 +77,234 @@ class ElyxConversationGenerator:
             'Neel': 'Neel',
             'Dr. Evans': 'Dr. Evans'
         }
-
-    def call_ollama(self, prompt: str) -> str:
-        """Call Ollama API via HTTP request"""
+        self.role_mapping = {
+            'Rohan Patel': 'Member',
+            'Ruby': 'Concierge',
+            'Dr. Warren': 'Medical Strategist',
+            'Advik': 'Performance Scientist',
+            'Carla': 'Nutritionist',
+            'Rachel': 'PT/Physiotherapist',
+            'Neel': 'Concierge Lead',
+            'Dr. Evans': 'Stress Management'
+        }
+        self.categorizer = MessageCategorizer(member_sender=self.member_name)
+        self.parser = WhatsAppLineParser(self.sender_mapping, self.role_mapping)
+
+    def call_ollama(self, prompt: str, num_predict: int = None, model: str = None,
+                    latency_budget: float = None) -> str:
+        """Call Ollama's generate API for a scenario prompt and return the response text.
+
+        Responses are served from the on-disk LLM cache when the same model
+        and prompt were generated before. ``num_predict`` caps the tokens
+        Ollama may generate, and ``model`` overrides the generator's model.
+        Raises ``OllamaError`` when Ollama cannot be reached or keeps failing
+        after retries, so a failed month is reported instead of skipped.
+
+        With a ``latency_budget`` the response is read as a stream and
+        abandoned with ``OllamaDeadlineError`` once the budget is spent,
+        whether the model is still loading, evaluating the prompt or
+        generating; a plain read timeout would be retried and count against
+        the server's circuit breaker.
+        """
+        model = model or self.model
+        if latency_budget:
+            deadline = time.monotonic() + latency_budget
+            parts = []
+            chunks = self.call_ollama_stream(prompt, num_predict, model, deadline)
+            try:
+                for text in chunks:
+                    parts.append(text)
+                    if time.monotonic() > deadline:
+                        raise OllamaDeadlineError(f"{model} missed its {latency_budget:g}s latency budget")
+            finally:
+                chunks.close()
+            return ''.join(parts)
+
+        prompt, fields = self.get_request(prompt, num_predict)
+        cache_key = self.get_cache_key(prompt, model, **fields)
+        self._last_response.value = None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached.get('response', '')
+
+        result = self.client.generate(model, prompt, **fields)
+        self._last_response.value = result
+        self.record_prompt_eval(result)
+        if cache_key and result.get('done', True):
+            self.cache.put(cache_key, model, result)
+        return result.get('response', '')
+
+    def call_ollama_stream(self, prompt: str, num_predict: int = None, model: str = None,
+                           deadline: float = None) -> Iterator[str]:
+        """Yield response text chunks from Ollama's NDJSON stream.
+
+        A cache hit is replayed as a single chunk; a fully consumed stream is
+        written back to the cache. A stream the caller stops reading early is
+        not cached; its stats count the chunks received and are timed here
+        (time to the first chunk stands in for prompt evaluation). No chunk
+        arriving by ``deadline`` (``time.monotonic()``) raises
+        ``OllamaDeadlineError``.
+        """
+        model = model or self.model
+        prompt, fields = self.get_request(prompt, num_predict)
+        cache_key = self.get_cache_key(prompt, model, **fields)
+        self._last_response.value = None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached.get('response', '')
+                return
+
+        parts = []
+        final_chunk = None
+        started = time.monotonic()
+        first_chunk_at = last_chunk_at = None
         try:
-            url = f"{self.base_url}/api/generate"
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False
-            }
-
-            response = requests.post(url, json=payload, timeout=600)
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', '')
-            else:
-                print(f"Ollama API error: {response.status_code}")
-                return ""
+            for chunk in self.client.generate_stream(model, prompt, deadline=deadline, **fields):
+                last_chunk_at = time.monotonic()
+                first_chunk_at = first_chunk_at or last_chunk_at
+                text = chunk.get('response', '')
+                parts.append(text)
+                yield text
+                if chunk.get('done'):
+                    final_chunk = chunk
+        finally:
+            if final_chunk is None and parts:
+                # Ollama streams one token per chunk, and only its final chunk carries durations
+                partial = {
+                    'done': False,
+                    'eval_count': len(parts),
+                    'total_duration': int((time.monotonic() - started) * 1e9),
+                    'prompt_eval_duration': int((first_chunk_at - started) * 1e9),
+                    'eval_duration': int((last_chunk_at - first_chunk_at) * 1e9)
+                }
+                self._last_response.value = partial
+                self.record_prompt_eval(partial)
+
+        if final_chunk is not None:
+            self._last_response.value = final_chunk
+            self.record_prompt_eval(final_chunk)
+            if cache_key:
+                self.cache.put(cache_key, model, dict(final_chunk, response=''.join(parts)))
+
+    def get_request(self, prompt: str, num_predict: int = None) -> Tuple[str, Dict]:
+        """Turn a scenario prompt into Ollama's ``prompt`` plus extra request fields.
+
+        In ``system`` mode the fixed system prompt travels in the ``system``
+        field, so a loaded model can reuse its already evaluated prefix
+        across scenarios; ``inline`` mode prepends it to every prompt. In
+        ``json`` output mode the response is constrained to
+        ``MESSAGES_JSON_SCHEMA`` through the ``format`` field, and
+        ``num_predict`` goes in ``options``.
+        """
+        fields = {}
+        if num_predict:
+            fields['options'] = {'num_predict': num_predict}
+        if self.output_format == 'json':
+            prompt += JSON_OUTPUT_REMINDER
+            fields['format'] = MESSAGES_JSON_SCHEMA
+        if self.system_prompt_mode == 'inline':
+            return self.get_system_prompt() + prompt, fields
+        fields['system'] = self.get_system_prompt()
+        return prompt.strip(), fields
+
+    def get_cache_key(self, prompt: str, model: str = None, **fields) -> str:
+        """Cache key for ``prompt`` with ``model`` (default the generator's), or None when bypassed"""
+        if not self.use_cache:
+            return None
+        return self.cache.make_key(model or self.model, prompt, **fields)
+
+    def pop_last_response(self) -> Optional[Dict]:
+        """Ollama's final response for this thread's last call; None for cache hits"""
+        result = getattr(self._last_response, 'value', None)
+        self._last_response.value = None
+        return result
+
+    def record_call_stat(self, member_id: int, scenario: Dict, result: Dict,
+                         messages_parsed: int, messages_saved: int, streamed: bool, model: str = None):
+        """Store Ollama's timing and token counters for one scenario call"""
+        try:
+            db.session.add(OllamaCallStat.from_response(
+                result, member_id=member_id, scenario=scenario['key'], month=scenario['month'],
+                model=model or self.model, streamed=streamed, output_format=self.output_format,
+                messages_parsed=messages_parsed, messages_saved=messages_saved))
+            db.session.commit()
         except Exception as e:
-            print(f"Error calling Ollama: {e}")
-            return ""
+            db.session.rollback()
+            print(f"   ⚠️ Could not record call stats for {scenario['label']}: {e}")
+
+    def record_prompt_eval(self, result: Dict):
+        """Add a response's prompt evaluation counters to ``prompt_eval_stats``"""
+        with self._stats_lock:
+            self.prompt_eval_stats['calls'] += 1
+            self.prompt_eval_stats['tokens'] += result.get('prompt_eval_count') or 0
+            self.prompt_eval_stats['seconds'] += (result.get('prompt_eval_duration') or 0) / 1e9
+
+    def iter_complete_lines(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Re-assemble streamed text chunks into complete lines"""
+        buffer = ''
+        for chunk in chunks:
+            buffer += chunk
+            while '\n' in buffer:
+                line, buffer = buffer.split('\n', 1)
+                yield line
+        if buffer.strip():
+            yield buffer
+
+    def stream_conversations(self, prompt: str, month: int,
+                             on_batch: Callable[[List[Dict]], None],
+                             batch_size: int = None,
+                             cancel_event: threading.Event = None,
+                             max_messages: int = None,
+                             num_predict: int = None,
+                             model: str = None,
+                             latency_budget: float = None) -> int:
+        """Stream a scenario from Ollama, handing parsed messages to ``on_batch``.
+
+        Messages are parsed as soon as their line is complete and flushed in
+        batches of ``batch_size``. Once ``max_messages`` have been parsed the
+        stream is closed, so Ollama stops generating. A stream still running
+        after ``latency_budget`` seconds is closed with
+        ``OllamaDeadlineError``. Whatever was parsed before a timeout, error
+        or cancellation is still flushed before returning.
+        """
+        batch_size = batch_size or Config.GENERATION_STREAM_BATCH_SIZE
+        batch = []
+        parsed_count = 0
+        deadline = time.monotonic() + latency_budget if latency_budget else None
+        chunks = self.call_ollama_stream(prompt, num_predict, model, deadline)
+
+        try:
+            for line in self.iter_complete_lines(chunks):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                if deadline is not None and time.monotonic() > deadline:
+                    raise OllamaDeadlineError(
+                        f"{model or self.model} missed its {latency_budget:g}s latency budget")
+                batch.extend(self.parse_ollama_response(line, month))
+                if max_messages and parsed_count + len(batch) >= max_messages:
+                    del batch[max_messages - parsed_count:]
+                    break
+                if len(batch) >= batch_size:
+                    parsed_count += len(batch)
+                    on_batch(batch)
+                    batch = []
+        finally:
+            chunks.close()
+            if batch:
+                parsed_count += len(batch)
+                on_batch(batch)
+
+        return parsed_count
 
     def get_system_prompt(self) -> str:
+        formatting = TEXT_FORMAT_INSTRUCTIONS if self.output_format != 'json' else JSON_FORMAT_INSTRUCTIONS
         return """You are an expert healthcare conversation generator for Elyx Healthcare.
 
 Generate realistic WhatsApp-style conversations between Rohan Patel (46-year-old FinTech executive based in Singapore) and healthcare team members.
 
-CRITICAL FORMATTING - Use EXACT format:
-[DD/MM/YY, HH:MM AM/PM] Sender: Message text here
-[15/01/25, 2:15 PM] Rohan Patel: My Garmin is logging consistently high intensity minutes...
-[15/01/25, 2:38 PM] Ruby: Hi Rohan, thank you for sharing this...
+""" + formatting + """
 
 MEMBER PROFILE:
 - Rohan Patel: 46-year-old Regional Head of Sales for FinTech
@@ -85,8 +326,8 @@ TEAM COMMUNICATION STYLES:
 
 Generate authentic healthcare conversations with specific data, medical reasoning, and realistic member interactions."""
     
-    def generate_onboarding_conversations(self) -> str:
-        prompt = self.get_system_prompt() + """
+    def build_onboarding_prompt(self) -> str:
+        return """
 
 Generate 15-20 realistic conversation messages for Rohan's FIRST WEEK onboarding (January 15-22, 2025).
 
@@ -109,9 +350,10 @@ REQUIREMENTS:
 - Realistic timestamps throughout the week (business hours Singapore time)
 - Reference his travel schedule, young children, supportive wife"""
 
-        return self.call_ollama(prompt)
+    def generate_onboarding_conversations(self) -> str:
+        return self.call_ollama(self.build_onboarding_prompt())
 
-    def generate_progress_conversations(self, month: int) -> str:
+    def build_progress_prompt(self, month: int) -> str:
         scenarios = {
             2: "Early progress monitoring, Zone 2 cardio experiments, travel protocols",
             3: "Member feedback period, workout plan improvements, magnesium breakthrough",
@@ -123,7 +365,7 @@ REQUIREMENTS:
 
         scenario = scenarios.get(month, "General progress and protocol adjustments")
 
-        prompt = self.get_system_prompt() + f"""
+        return f"""
 
 Generate 12-15 conversation messages for Month {month} (2025).
 
@@ -139,10 +381,11 @@ Include realistic:
 
 Show progression in relationship and member's growing engagement with the process."""
 
-        return self.call_ollama(prompt)
+    def generate_progress_conversations(self, month: int) -> str:
+        return self.call_ollama(self.build_progress_prompt(month))
 
-    def generate_setback_conversations(self) -> str:
-        prompt = self.get_system_prompt() + """
+    def build_setback_prompt(self) -> str:
+        return """
 
 Generate 20-25 messages for ILLNESS SETBACK period (May 2-7, 2025).
 
@@ -157,10 +400,11 @@ SCENARIO: Viral infection detection and management
 Show crisis management, team coordination, and data-driven medical decisions.
 Include specific biomarker numbers and timestamps."""
 
-        return self.call_ollama(prompt)
+    def generate_setback_conversations(self) -> str:
+        return self.call_ollama(self.build_setback_prompt())
 
-    def generate_breakthrough_conversations(self) -> str:
-        prompt = self.get_system_prompt() + """
+    def build_breakthrough_prompt(self) -> str:
+        return """
 
 Generate 10-12 messages showing KEY BREAKTHROUGH moments:
 
@@ -172,202 +416,465 @@ Generate 10-12 messages showing KEY BREAKTHROUGH moments:
 Show member excitement, data validation, and team analysis of what worked.
 Include specific numbers and member's analytical satisfaction with results."""
 
-        return self.call_ollama(prompt)
+    def generate_breakthrough_conversations(self) -> str:
+        return self.call_ollama(self.build_breakthrough_prompt())
+
+    def build_top_up_prompt(self, scenario: Dict, recent: List[Dict], missing: int) -> str:
+        """Follow-up prompt asking for just ``missing`` more messages of a scenario.
+
+        The scenario prompt is repeated for context, followed by the last
+        few messages already generated so the model continues after them.
+        """
+        prompt = scenario['prompt']
+        recent = recent[-Config.GENERATION_TOP_UP_CONTEXT_MESSAGES:]
+        if recent:
+            lines = '\n'.join(
+                f"[{conv['timestamp'].strftime('%d/%m/%y, %I:%M %p').lstrip('0')}] {conv['sender']}: {conv['message']}"
+                for conv in recent)
+            prompt += f"""
+
+THE CONVERSATION SO FAR ENDS WITH:
+{lines}
+
+Continue from there: generate ONLY the next {missing} messages, all timestamped after {recent[-1]['timestamp'].strftime('%d/%m/%y, %I:%M %p').lstrip('0')}.
+Do not repeat or summarize earlier messages."""
+        else:
+            prompt += f"""
+
+Generate ONLY {missing} messages."""
+        return prompt
+
+    def get_scenarios(self, months: Iterable[int] = None, keys: Iterable[str] = None) -> List[Dict]:
+        """Scenario graph for a full dataset run.
+
+        Progress months 2-4 and the month 5 setback only build on the
+        onboarding week; months 6-8 follow the setback. ``min_messages`` and
+        ``max_messages`` mirror the message range each prompt asks for. ``months`` or
+        ``keys`` limit the graph to those scenarios, dropping dependencies
+        on the others.
+        """
+        scenarios = [{
+            'key': 'onboarding',
+            'month': 1,
+            'kind': 'onboarding',
+            'label': 'Month 1 (Onboarding)',
+            'depends_on': [],
+            'min_messages': 15,
+            'max_messages': 20,
+            'build_prompt': self.build_onboarding_prompt
+        }]
+
+        for month in [2, 3, 4]:
+            scenarios.append({
+                'key': f'month_{month}',
+                'month': month,
+                'kind': 'progress',
+                'label': f'Month {month} (Progress)',
+                'depends_on': ['onboarding'],
+                'min_messages': 12,
+                'max_messages': 15,
+                'build_prompt': lambda month=month: self.build_progress_prompt(month)
+            })
+
+        scenarios.append({
+            'key': 'setback',
+            'month': 5,
+            'kind': 'setback',
+            'label': 'Month 5 (Illness Setback)',
+            'depends_on': ['onboarding'],
+            'min_messages': 20,
+            'max_messages': 25,
+            'build_prompt': self.build_setback_prompt
+        })
+
+        for month in [6, 7, 8]:
+            scenarios.append({
+                'key': f'month_{month}',
+                'month': month,
+                'kind': 'progress',
+                'label': f'Month {month} (Progress)',
+                'depends_on': ['setback'],
+                'min_messages': 12,
+                'max_messages': 15,
+                'build_prompt': lambda month=month: self.build_progress_prompt(month)
+            })
+
+        if months is not None:
+            months = set(months)
+            scenarios = self.prune_scenarios(
+                scenarios, {scenario['key'] for scenario in scenarios if scenario['month'] in months})
+        if keys is not None:
+            scenarios = self.prune_scenarios(scenarios, set(keys))
+
+        return scenarios
+
+    @staticmethod
+    def prune_scenarios(scenarios: List[Dict], keep: set) -> List[Dict]:
+        """Keep only scenarios whose key is in ``keep``, dropping dependencies on the rest"""
+        kept = [scenario for scenario in scenarios if scenario['key'] in keep]
+        for scenario in kept:
+            scenario['depends_on'] = [dep for dep in scenario['depends_on'] if dep in keep]
+        return kept
+
+    def get_model_route(self, scenario: Dict) -> Dict:
+        """Model, latency budget (seconds) and fallback model for ``scenario``.
+
+        With ``GENERATION_MODEL_ROUTING`` the route comes from
+        ``GENERATION_MODEL_ROUTES`` by scenario key, then by kind; otherwise
+        every scenario uses the generator's model. A budget is only enforced
+        when there is a different model to fall back to.
+        """
+        route = {'model': self.model, 'latency_budget': None, 'fallback': None}
+        if self.model_routing:
+            routes = Config.GENERATION_MODEL_ROUTES
+            route.update(routes.get(scenario['key']) or routes.get(scenario['kind']) or {})
+        if not route['fallback'] or route['fallback'] == route['model']:
+            route.update(latency_budget=None, fallback=None)
+        return route
+
+    def get_prompt_hash(self, prompt: str, model: str = None) -> str:
+        return hashlib.sha256(f"{model or self.model}\n{prompt}".encode('utf-8')).hexdigest()
+
+    def record_checkpoint(self, member_id: int, scenario: Dict, status: str,
+                          message_count: int = 0, error: str = None):
+        """Upsert the member's checkpoint row for ``scenario``"""
+        checkpoint = GenerationCheckpoint.query.filter_by(
+            member_id=member_id, scenario=scenario['key']).first()
+        if checkpoint is None:
+            checkpoint = GenerationCheckpoint(member_id=member_id, scenario=scenario['key'])
+            db.session.add(checkpoint)
+
+        now = datetime.datetime.utcnow()
+        checkpoint.status = status
+        checkpoint.prompt_hash = scenario['prompt_hash']
+        checkpoint.message_count = message_count
+        checkpoint.error = error
+        if status == 'running':
+            checkpoint.started_at = now
+            checkpoint.finished_at = None
+        else:
+            checkpoint.finished_at = now
+        db.session.commit()
+
+    def get_completed_scenarios(self, member_id: int, scenarios: List[Dict]) -> set:
+        """Keys of scenarios already completed with the same prompt and model"""
+        prompt_hashes = {scenario['key']: scenario['prompt_hash'] for scenario in scenarios}
+        completed = GenerationCheckpoint.query.filter_by(member_id=member_id, status='completed').all()
+        return {checkpoint.scenario for checkpoint in completed
+                if prompt_hashes.get(checkpoint.scenario) == checkpoint.prompt_hash}
 
     def parse_ollama_response(self, response: str, month: int = None) -> List[Dict]:
-        """Parse Ollama response with proper date formatting"""
-        conversations = []
-        lines = response.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('[') and ']' in line and ':' in line:
-                try:
-                    end_bracket = line.find(']')
-                    timestamp_str = line[1:end_bracket].strip()
-                    
-                    # ✅ Handle different date formats
-                    if ',' in timestamp_str:
-                        # Format: [DD/MM/YY, HH:MM AM/PM]
-                        date_part, time_part = timestamp_str.split(', ')
-                        if '/' in date_part and len(date_part.split('/')) == 3:
-                            day, month_num, year = date_part.split('/')
-                            # Convert to full datetime string for parsing
-                            full_timestamp = f"20{year}-{month_num.zfill(2)}-{day.zfill(2)} {time_part}"
-                        else:
-                            full_timestamp = timestamp_str
-                    else:
-                        full_timestamp = timestamp_str
-                    
-                    remainder = line[end_bracket+1:].strip()
-                    if ':' in remainder:
-                        colon_pos = remainder.find(':')
-                        sender = remainder[:colon_pos].strip()
-                        message = remainder[colon_pos+1:].strip()
-                        
-                        # Clean sender name
-                        if '(' in sender and ')' in sender:
-                            sender = sender.split('(')[0].strip()
-                        
-                        # Map to actual display names
-                        display_sender = self.sender_mapping.get(sender, sender)
-                        
-                        conversations.append({
-                            'timestamp': full_timestamp,
-                            'sender': display_sender,
-                            'sender_role': self.get_sender_role(display_sender),
-                            'message': message,
-                            'category': self.categorize_message(message, display_sender),
-                            'month': month or 1
-                        })
-                        
-                except Exception as e:
-                    print(f"Error parsing line '{line}': {e}")
-                    continue
-        
+        """Parse Ollama response into categorized messages with ``datetime`` timestamps"""
+        started = time.perf_counter()
+        if self.output_format == 'json':
+            conversations = self.parser.parse_json(response, month)
+        else:
+            conversations = self.parser.parse(response, month)
+        parsed = time.perf_counter()
+        categories = self.categorizer.categorize_batch(
+            [conv['message'] for conv in conversations], [conv['sender'] for conv in conversations])
+        for conv, category in zip(conversations, categories):
+            conv['category'] = category
+        finished = time.perf_counter()
+
+        with self._stats_lock:
+            self.stage_seconds['parse'] += parsed - started
+            self.stage_seconds['categorize'] += finished - parsed
         return conversations
-    
+
     def get_sender_role(self, sender):
         """Get sender role for UI display"""
-        role_mapping = {
-            'Rohan Patel': 'Member',
-            'Ruby': 'Concierge',
-            'Dr. Warren': 'Medical Strategist',  
-            'Advik': 'Performance Scientist',
-            'Carla': 'Nutritionist',
-            'Rachel': 'PT/Physiotherapist',
-            'Neel': 'Concierge Lead',
-            'Dr. Evans': 'Stress Management'
-        }
-        return role_mapping.get(sender, 'Team Member')
+        return self.role_mapping.get(sender, 'Team Member')
 
     def categorize_message(self, message: str, sender: str) -> str:
         """Categorize message based on content"""
-        message_lower = message.lower()
-        
-        if any(word in message_lower for word in ['emergency', 'urgent', 'critical', 'immediately']):
-            return 'emergency'
-        elif any(word in message_lower for word in ['data', 'hrv', 'whoop', 'recovery', 'sleep']):
-            return 'data_analysis'
-        elif any(word in message_lower for word in ['exercise', 'zone 2', 'workout', 'cardio']):
-            return 'exercise'
-        elif any(word in message_lower for word in ['nutrition', 'food', 'supplement', 'cgm']):
-            return 'nutrition'
-        elif any(word in message_lower for word in ['travel', 'trip', 'flight', 'protocol']):
-            return 'travel'
-        elif any(word in message_lower for word in ['schedule', 'appointment', 'calendar']):
-            return 'scheduling'
-        elif sender == 'Rohan Patel':
-            return 'member_inquiry'
-        else:
-            return 'team_response'
-
-    def save_conversations_to_db(self, conversations: List[Dict], member_id: int):
-        """Save conversations with proper member names"""
-        successful_saves = 0
-        
-        member = Member.query.get(member_id)
-        member_name = member.preferred_name if member else "Rohan Patel"
-        
+        return self.categorizer.categorize(message, sender)
+
+    def get_roster(self) -> Dict[str, int]:
+        """Team member name -> id, loaded once per generator"""
+        if self._roster is None:
+            self._roster = {name: tm_id for tm_id, name in
+                            db.session.query(TeamMember.id, TeamMember.name).all()}
+        return self._roster
+
+    def get_member_name(self, member_id: int) -> str:
+        if member_id not in self._member_names:
+            member = Member.query.get(member_id)
+            self._member_names[member_id] = member.preferred_name if member else "Rohan Patel"
+        return self._member_names[member_id]
+
+    def save_conversations_to_db(self, conversations: List[Dict], member_id: int,
+                                 replace_month: int = None):
+        """Save a batch of conversations in a single transaction.
+
+        Senders are resolved against the cached team roster; senders the LLM
+        invented are added to ``team_members`` with one flush for the whole
+        batch, and all conversation rows go in with one executemany upsert
+        that skips rows whose content hash is already stored. With
+        ``replace_month`` the member's existing rows for that month are
+        deleted in the same transaction. The member's ``member_stats`` row is
+        updated in that transaction too: incrementally for new rows, with a
+        full recompute after a month replacement. Returns the number of new
+        rows.
+        """
+        started = time.perf_counter()
+        member_name = self.get_member_name(member_id)
+        roster = self.get_roster()
+
+        new_team_members = {}
         for conv_data in conversations:
-            try:
-                # ✅ Better timestamp parsing
-                timestamp_str = conv_data['timestamp']
-                try:
-                    timestamp = parse(timestamp_str)
-                except:
-                    # Fallback for date parsing
-                    from datetime import datetime
-                    timestamp = datetime.now()
-                
-                sender = conv_data['sender']
-                
-                # Handle team member vs member
-                team_member = None
-                if sender != member_name:  # It's a team member
-                    team_member = TeamMember.query.filter_by(name=sender).first()
-                    if not team_member:
-                        team_member = TeamMember(
-                            name=sender,
-                            role=conv_data.get('sender_role', 'Team Member'),
-                            specialty=conv_data.get('sender_role', 'Team Member'),
-                            communication_style="Professional"
-                        )
-                        db.session.add(team_member)
-                        db.session.flush()
-                
-                # ✅ Create conversation with proper sender name
-                conversation = Conversation(
-                    member_id=member_id,
-                    team_member_id=team_member.id if team_member else None,
-                    sender=sender,  # Use actual name for display
-                    message=conv_data['message'],
-                    category=conv_data.get('category', 'general'),
-                    timestamp=timestamp,
-                    month=conv_data.get('month', 1)
+            sender = conv_data['sender']
+            if sender != member_name and sender not in roster and sender not in new_team_members:
+                new_team_members[sender] = TeamMember(
+                    name=sender,
+                    role=conv_data.get('sender_role', 'Team Member'),
+                    specialty=conv_data.get('sender_role', 'Team Member'),
+                    communication_style="Professional"
                 )
-                
-                db.session.add(conversation)
-                successful_saves += 1
-                
-            except Exception as e:
-                print(f"Error saving conversation: {e}")
-                continue
-        
-        db.session.commit()
-        return successful_saves
 
+        try:
+            if new_team_members:
+                db.session.add_all(new_team_members.values())
+                db.session.flush()
+
+            rows = []
+            for conv_data in conversations:
+                try:
+                    timestamp = conv_data['timestamp']
+                    if not isinstance(timestamp, datetime.datetime):
+                        timestamp = parse_timestamp(str(timestamp))
+                        if timestamp is None:
+                            print(f"Skipping conversation with unparseable timestamp: {conv_data['timestamp']}")
+                            continue
+
+                    sender = conv_data['sender']
+                    team_member_id = None
+                    if sender != member_name:  # It's a team member
+                        team_member_id = roster.get(sender)
+                        if team_member_id is None:
+                            team_member_id = new_team_members[sender].id
+
+                    rows.append({
+                        'member_id': member_id,
+                        'team_member_id': team_member_id,
+                        'sender': sender,  # Use actual name for display
+                        'message': conv_data['message'],
+                        'category': conv_data.get('category', 'general'),
+                        'timestamp': timestamp,
+                        'month': conv_data.get('month', 1),
+                        'model': conv_data.get('model'),
+                        'content_hash': Conversation.compute_content_hash(
+                            member_id, timestamp, sender, conv_data['message'])
+                    })
+                except Exception as e:
+                    print(f"Error saving conversation: {e}")
+                    continue
 
-    def generate_full_dataset(self, member_id: int):
-        """Generate complete conversation dataset with robust error handling"""
+            if replace_month is not None:
+                Conversation.query.filter_by(member_id=member_id, month=replace_month) \
+                    .delete(synchronize_session=False)
+
+            known = self._member_team_members.setdefault(member_id, set())
+            batch_team_members = {row['team_member_id'] for row in rows if row['team_member_id'] is not None}
+            unseen = set()
+            if replace_month is None:
+                unseen = unseen_team_members(member_id, batch_team_members - known)
+
+            inserted = 0
+            if rows:
+                inserted = db.session.connection().execute(self.get_upsert_statement(), rows).rowcount
+            if replace_month is not None:
+                refresh_member_stats([member_id])
+            elif inserted:
+                timestamps = [row['timestamp'] for row in rows]
+                add_conversations(member_id, inserted, min(timestamps), max(timestamps), bool(unseen))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # Only cache new senders once their rows are committed
+        for name, team_member in new_team_members.items():
+            roster[name] = team_member.id
+        if replace_month is not None:
+            # The replaced month may have held a team member's only messages
+            del self._member_team_members[member_id]
+        else:
+            known.update(batch_team_members)
+
+        self.save_stats['rows'] += inserted
+        self.save_stats['duplicates'] += len(rows) - inserted
+        self.save_stats['seconds'] += time.perf_counter() - started
+        return inserted
+
+    def get_upsert_statement(self):
+        """INSERT that ignores rows whose content hash already exists"""
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            return sqlite_insert(Conversation).on_conflict_do_nothing(index_elements=['content_hash'])
+        if dialect == 'postgresql':
+            return postgresql_insert(Conversation).on_conflict_do_nothing(index_elements=['content_hash'])
+        if dialect == 'mysql':
+            return insert(Conversation).prefix_with('IGNORE')
+        return insert(Conversation)
+
+    def get_save_rate(self) -> float:
+        """Rows saved per second of database write time so far"""
+        if not self.save_stats['seconds']:
+            return 0.0
+        return self.save_stats['rows'] / self.save_stats['seconds']
+
+    def generate_full_dataset(self, member_id: int, max_concurrency: int = None,
+                              stream: bool = None,
+                              progress: Callable[[Dict, str, int, Optional[str]], None] = None,
+                              cancel_event: threading.Event = None,
+                              replace_months: Iterable[int] = None,
+                              resume: bool = False,
+                              scenario_keys: Iterable[str] = None):
+        """Generate complete conversation dataset with robust error handling.
+
+        Independent scenarios are sent to Ollama concurrently: at most
+        ``max_concurrency`` at once when given, otherwise as many as the
+        shared AIMD limiter for this Ollama target currently allows. In
+        streaming mode (default ``Config.GENERATION_STREAMING``) messages are
+        saved in small batches while a scenario is still generating;
+        otherwise each response is parsed and saved as soon as it arrives.
+        All database writes happen on this thread.
+
+        ``progress(scenario, status, saved_count, error)`` is called as
+        scenarios start and finish (``error`` is set for failed ones);
+        setting ``cancel_event`` stops new scenarios from starting and cuts
+        streaming ones short.
+
+        Each scenario's calls are made by a ``ScenarioRun``: a scenario that
+        parses fewer than its ``min_messages`` gets up to
+        ``Config.GENERATION_MAX_TOP_UPS`` follow-up requests for just the
+        missing messages, and a stream is closed once ``max_messages`` have
+        arrived, so no tokens are spent on messages beyond the range. A
+        non-streamed response can't be cut short, so messages past
+        ``max_messages`` are dropped after parsing.
+
+        Rows already stored (same content hash) are skipped, so repeated runs
+        only add new messages. ``replace_months`` regenerates just those
+        months, each replacing the stored month in a single transaction
+        (streaming is turned off so the whole month is written at once).
+
+        Every scenario's progress is checkpointed per member. With ``resume``
+        scenarios already completed with the same prompt and model are
+        skipped and only failed or missing ones are generated.
+        ``scenario_keys`` runs only the named scenarios.
+        """
         print("🚀 Starting conversation generation with Ollama...")
         total_generated = 0
-
-        try:
-            # Month 1: Onboarding
-            print("📅 Generating Month 1 (Onboarding)...")
+        stream = Config.GENERATION_STREAMING if stream is None else stream
+        scenarios = self.get_scenarios(replace_months, scenario_keys)
+        if replace_months is not None or self.output_format == 'json':
+            # Replacing a month deletes it per save, and a JSON document can't be saved line by line
+            stream = False
+        for scenario in scenarios:
+            scenario['prompt'] = scenario['build_prompt']()
+            scenario['route'] = self.get_model_route(scenario)
+            scenario['prompt_hash'] = self.get_prompt_hash(self.get_system_prompt() + scenario['prompt'],
+                                                           scenario['route']['model'])
+
+        if resume:
+            completed = self.get_completed_scenarios(member_id, scenarios)
+            for scenario in scenarios:
+                if scenario['key'] in completed:
+                    print(f"⏭️ Skipping {scenario['label']} (already completed)")
+                    if progress is not None:
+                        progress(scenario, 'skipped', 0, None)
+            scenarios = self.prune_scenarios(
+                scenarios, {scenario['key'] for scenario in scenarios if scenario['key'] not in completed})
+        limiter = None
+        if max_concurrency is None and Config.GENERATION_ADAPTIVE_CONCURRENCY:
+            limiter = get_concurrency_limiter(f"{self.model}@{self.base_url}")
+        scheduler = GenerationScheduler(max_concurrency or Config.GENERATION_CONCURRENCY, limiter)
+        saved_by_scenario = {}
+        save_errors = set()
+
+        def report(scenario, status, error=None):
+            saved_count = saved_by_scenario.get(scenario['key'], 0)
+            if progress is not None:
+                progress(scenario, status, saved_count, error)
             try:
-                response = self.generate_onboarding_conversations()
-                if response.strip():  # Check if we got a response
-                    conversations = self.parse_ollama_response(response, 1)
-                    saved_count = self.save_conversations_to_db(conversations, member_id)
-                    total_generated += saved_count
-                    print(f"   ✅ Generated {saved_count} messages")
-                else:
-                    print("   ❌ No response from Ollama for Month 1")
+                self.record_checkpoint(member_id, scenario, status, saved_count, error)
             except Exception as e:
-                print(f"   ❌ Error generating Month 1: {e}")
-
-            # Continue with other months with similar error handling...
-            for month in [2, 3, 4, 6, 7, 8]:
-                print(f"📅 Generating Month {month} (Progress)...")
-                try:
-                    response = self.generate_progress_conversations(month)
-                    if response.strip():
-                        conversations = self.parse_ollama_response(response, month)
-                        saved_count = self.save_conversations_to_db(conversations, member_id)
-                        total_generated += saved_count
-                        print(f"   ✅ Generated {saved_count} messages")
-                    else:
-                        print(f"   ❌ No response from Ollama for Month {month}")
-                except Exception as e:
-                    print(f"   ❌ Error generating Month {month}: {e}")
+                db.session.rollback()
+                print(f"   ⚠️ Could not checkpoint {scenario['label']}: {e}")
 
-            # Month 5: Setback with error handling
-            print("📅 Generating Month 5 (Illness Setback)...")
+        def save_batch(scenario, conversations):
+            nonlocal total_generated
             try:
-                response = self.generate_setback_conversations()
-                if response.strip():
-                    conversations = self.parse_ollama_response(response, 5)
-                    saved_count = self.save_conversations_to_db(conversations, member_id)
-                    total_generated += saved_count
-                    print(f"   ✅ Generated {saved_count} messages")
+                saved_count = self.save_conversations_to_db(
+                    conversations, member_id,
+                    replace_month=scenario['month'] if replace_months is not None else None
+                )
             except Exception as e:
-                print(f"   ❌ Error generating setback conversations: {e}")
+                save_errors.add(scenario['key'])
+                print(f"   ❌ Error saving {scenario['label']}: {e}")
+                return
+            saved_by_scenario[scenario['key']] = saved_by_scenario.get(scenario['key'], 0) + saved_count
+            total_generated += saved_count
+            if progress is not None:
+                progress(scenario, 'running', saved_by_scenario[scenario['key']], None)
+
+        runs = {scenario['key']: ScenarioRun(self, scenario, stream, cancel_event) for scenario in scenarios}
+
+        def work(scenario, report_batch):
+            return runs[scenario['key']].run(report_batch)
+
+        def on_complete(scenario, conversations, error):
+            run = runs[scenario['key']]
+            # A primary abandoned for a fallback reports its miss as an overload
+            run.feed_limiter(limiter)
+            saved_count = saved_by_scenario.get(scenario['key'], 0)
+            if error is not None:
+                kept = f" (kept {saved_count} streamed messages)" if saved_count else ""
+                print(f"   ❌ Error generating {scenario['label']}{kept}: {error}")
+                report(scenario, 'failed', str(error))
+                return
+
+            if conversations is None:  # Check if we got a response
+                print(f"   ❌ No response from Ollama for {scenario['label']}")
+                report(scenario, 'failed', 'Empty response from Ollama')
+                return
+            if not stream:
+                save_batch(scenario, conversations)
+                saved_count = saved_by_scenario.get(scenario['key'], 0)
+            run.record_call_stats(member_id, saved_count)
+
+            if scenario['key'] in save_errors:
+                report(scenario, 'failed', 'Could not save generated messages')
+                return
+
+            if stream and cancel_event is not None and cancel_event.is_set():
+                print(f"   ⏹️ {scenario['label']}: cancelled after {saved_count} messages")
+                report(scenario, 'cancelled')
+                return
+
+            short = f" (short of {scenario['min_messages']})" if len(conversations) < scenario['min_messages'] else ""
+            print(f"   ✅ {scenario['label']}: generated {saved_count} messages{short}")
+            report(scenario, 'completed')
+
+        try:
+            scheduler.run(scenarios, work, on_complete,
+                          on_progress=save_batch,
+                          on_start=lambda scenario: report(scenario, 'running'),
+                          cancel_event=cancel_event)
 
             # Final count from database
             final_count = Conversation.query.filter_by(member_id=member_id).count()
             print(f"\n🎉 Total conversations saved to database: {final_count}")
+            print(f"   💾 Saved {self.save_stats['rows']} rows at {self.get_save_rate():.0f} rows/s "
+                  f"({self.save_stats['duplicates']} duplicates skipped)")
+            if self.cache is not None:
+                cache_stats = self.cache.stats()
+                print(f"   🗄️ LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+            if self.prompt_eval_stats['calls']:
+                print(f"   🧮 Prompt eval (system prompt {self.system_prompt_mode}): "
+                      f"{self.prompt_eval_stats['tokens']} tokens in {self.prompt_eval_stats['seconds']:.2f}s "
+                      f"over {self.prompt_eval_stats['calls']} calls")
 
             return final_count
 
@@ -0,0 +1,170 @@
+import html
+import re
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from config import Config
+from models import db, Conversation
+
+FTS_TABLE = 'conversations_fts'
+
+# Highlight markers around matched terms in snippets. FTS5 brackets matches
+# with control characters that can't clash with message text; they become
+# these tags once the snippet has been HTML-escaped
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+# bm25 column weights: a hit in the message counts more than one in sender or
+# category; member_id is only indexed to filter on, so it doesn't score
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 0.0)
+
+_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        message, sender, category, member_id,
+        content='conversations', content_rowid='id',
+        tokenize='porter unicode61', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, message, sender, category, member_id)
+        VALUES (new.id, new.message, new.sender, new.category, new.member_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message, sender, category, member_id)
+        VALUES ('delete', old.id, old.message, old.sender, old.category, old.member_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF message, sender, category, member_id
+        ON conversations BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message, sender, category, member_id)
+        VALUES ('delete', old.id, old.message, old.sender, old.category, old.member_id);
+        INSERT INTO {FTS_TABLE}(rowid, message, sender, category, member_id)
+        VALUES (new.id, new.message, new.sender, new.category, new.member_id);
+    END""",
+]
+
+_available = {}
+
+
+def ensure_search_index() -> bool:
+    """Create the FTS5 index over conversations and the triggers that keep it in sync.
+
+    The index is an external-content table, so it stores only the inverted
+    index, not a second copy of every message. Existing conversations are
+    indexed the first time it is created. Returns False (and search falls
+    back to LIKE) when the database is not SQLite or lacks FTS5.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return _remember(False)
+    try:
+        with db.engine.begin() as conn:
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                  {'name': FTS_TABLE}).first()
+            for statement in _FTS_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                print(f"🔧 Built full-text index {FTS_TABLE}")
+    except OperationalError as e:
+        print(f"⚠️  Full-text search unavailable, falling back to LIKE: {e.orig}")
+        return _remember(False)
+    return _remember(True)
+
+
+def rebuild_search_index():
+    """Re-index every conversation from scratch"""
+    with db.engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def search_index_available() -> bool:
+    url = str(db.engine.url)
+    if url not in _available:
+        _available[url] = db.engine.dialect.name == 'sqlite' and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}).first() is not None
+    return _available[url]
+
+
+def _remember(available: bool) -> bool:
+    _available[str(db.engine.url)] = available
+    return available
+
+
+def build_match_query(query: str) -> str:
+    """FTS5 MATCH expression for free text typed into the search box.
+
+    Every word must match; the last one is a prefix so results show up
+    while the word is still being typed. Words are quoted so FTS5 syntax
+    (``AND``, ``*``, ``:``) in the input is searched for, not interpreted.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    if not query[-1:].isspace():
+        quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_conversations(query: str, member_id: int = None, limit: int = 50) -> List[Dict]:
+    """Conversations matching ``query``, best bm25 rank first, with highlighted snippets.
+
+    Uses the FTS5 index when there is one, otherwise a ``LIKE`` scan in
+    timestamp order (no ranking, no snippets). An empty query lists the
+    first conversations in timestamp order.
+
+    Only the newest ``SEARCH_RANK_CANDIDATES`` matches are scored, so a
+    term that appears in a large share of messages costs the same as a
+    rare one. The member filter is part of the MATCH, intersected inside
+    the index rather than checked row by row.
+    """
+    if not query.strip() or not search_index_available():
+        return search_conversations_like(query, member_id, limit)
+
+    match = build_match_query(query)
+    if not match:
+        return []
+    if member_id:
+        match = f'member_id : "{int(member_id)}" AND ({match})'
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    rows = db.session.execute(text(f"""
+        SELECT c.id, c.member_id, c.team_member_id, c.sender, c.message, c.category, c.timestamp,
+               c.month, c.model, matches.rank, matches.snippet
+        FROM (
+            SELECT rowid, bm25({FTS_TABLE}, {weights}) AS rank,
+                   snippet({FTS_TABLE}, 0, :start, :end, '…', 16) AS snippet
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH :match
+            ORDER BY rowid DESC
+            LIMIT :candidates
+        ) AS matches
+        JOIN conversations c ON c.id = matches.rowid
+        ORDER BY matches.rank
+        LIMIT :limit
+    """).columns(timestamp=Conversation.timestamp.type), {
+        'match': match, 'candidates': Config.SEARCH_RANK_CANDIDATES, 'limit': limit,
+        'start': _MATCH_START, 'end': _MATCH_END
+    }).mappings().all()
+
+    return [dict(row, timestamp=row['timestamp'].isoformat(), rank=round(row['rank'], 3),
+                 snippet=highlight_snippet(row['snippet'])) for row in rows]
+
+
+def highlight_snippet(snippet: str) -> str:
+    """HTML-escape an FTS5 snippet, then wrap its matches in ``SNIPPET_START``/``SNIPPET_END``"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MATCH_START, SNIPPET_START).replace(_MATCH_END, SNIPPET_END)
+
+
+def search_conversations_like(query: str, member_id: int = None, limit: int = 50) -> List[Dict]:
+    conversations_query = Conversation.query
+    if member_id:
+        conversations_query = conversations_query.filter_by(member_id=member_id)
+    if query:
+        conversations_query = conversations_query.filter(Conversation.message.contains(query))
+    conversations = conversations_query.order_by(Conversation.timestamp, Conversation.id).limit(limit).all()
+    return [dict(conv.to_dict(), rank=None, snippet=None) for conv in conversations]
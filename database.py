@@ -1,10 +1,91 @@
-from models import db, Member, TeamMember, TimelineEvent, HealthMetric, Decision, TeamMetric
+from models import db, Member, TeamMember, Conversation, TimelineEvent, HealthMetric, Decision, TeamMetric, MemberStats, chunked
 from datetime import datetime, date
+from sqlalchemy import inspect, text, update
+from conversation_search import ensure_search_index
+from member_stats import refresh_member_stats, rebuild_member_stats
 import json
 
+def migrate_database():
+    """Bring databases created by older versions up to the current schema.
+
+    ``db.create_all()`` only creates missing tables, so new columns and
+    indexes on existing tables are added here.
+    """
+    add_column_if_missing('conversations', 'content_hash', 'VARCHAR(64)')
+    add_column_if_missing('conversations', 'model', 'VARCHAR(100)')
+    backfill_conversation_hashes()
+
+    add_column_if_missing('ollama_call_stats', 'output_format', "VARCHAR(10) NOT NULL DEFAULT 'text'")
+    add_column_if_missing('ollama_call_stats', 'messages_saved', 'INTEGER NOT NULL DEFAULT 0')
+
+    # Indexes declared in __table_args__ after a table was first created
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+    ensure_search_index()
+    backfill_member_stats()
+
+def add_column_if_missing(table: str, column: str, definition: str):
+    columns = {existing['name'] for existing in inspect(db.engine).get_columns(table)}
+    if column not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'))
+        print(f"🔧 Added {table}.{column}")
+
+def backfill_conversation_hashes():
+    """Hash conversations saved before content hashes existed, dropping duplicates"""
+    missing = db.session.query(
+        Conversation.id, Conversation.member_id, Conversation.timestamp,
+        Conversation.sender, Conversation.message
+    ).filter(Conversation.content_hash.is_(None)).order_by(Conversation.id).all()
+    if not missing:
+        return
+
+    seen = {content_hash for (content_hash,) in db.session.query(Conversation.content_hash)
+            .filter(Conversation.content_hash.isnot(None))}
+    updates = []
+    duplicate_ids = []
+    for row in missing:
+        content_hash = Conversation.compute_content_hash(row.member_id, row.timestamp, row.sender, row.message)
+        if content_hash in seen:
+            duplicate_ids.append(row.id)
+        else:
+            seen.add(content_hash)
+            updates.append({'id': row.id, 'content_hash': content_hash})
+
+    for chunk in chunked(duplicate_ids):
+        Conversation.query.filter(Conversation.id.in_(chunk)).delete(synchronize_session=False)
+    if updates:
+        db.session.execute(update(Conversation), updates)
+    db.session.commit()
+    print(f"🔧 Hashed {len(updates)} conversations, removed {len(duplicate_ids)} duplicates")
+
+def backfill_member_stats():
+    """Fill member_stats for databases created before the table existed"""
+    if MemberStats.query.first() is None and Member.query.first() is not None:
+        refreshed = rebuild_member_stats()
+        print(f"🔧 Computed stats for {refreshed} members")
+
+def create_synthetic_members(count: int):
+    """Add ``count`` numbered copies of the sample member, for load testing"""
+    template = Member.query.order_by(Member.id).first()
+    members = [
+        Member(name=f"{template.name} {i}", preferred_name=template.preferred_name, age=template.age,
+               gender=template.gender, location=template.location, occupation=template.occupation,
+               health_goals=template.health_goals, chronic_conditions=template.chronic_conditions,
+               wearables=template.wearables)
+        for i in range(1, count + 1)
+    ]
+    db.session.add_all(members)
+    db.session.flush()
+    refresh_member_stats(member.id for member in members)
+    db.session.commit()
+
 def init_database():
     """Initialize database with sample data"""
     db.create_all()
+    migrate_database()
 
     # Create sample member
     member = Member.query.first()
@@ -308,6 +389,7 @@ def init_database():
             metric = TeamMetric(**metric_data)
             db.session.add(metric)
 
+    refresh_member_stats([member.id])
     db.session.commit()
     print("✅ Database initialized with sample data")
     return member.id
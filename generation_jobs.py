@@ -0,0 +1,169 @@
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from conversation_generator import ElyxConversationGenerator
+
+
+class GenerationJob:
+    """A conversation generation run tracked for the progress endpoint"""
+
+    def __init__(self, member_id: int, scenarios, use_cache: bool = None,
+                 replace_months: List[int] = None, resume: bool = False):
+        self.id = uuid.uuid4().hex
+        self.member_id = member_id
+        self.use_cache = use_cache
+        self.replace_months = replace_months
+        self.resume = resume
+        self.status = 'queued'  # queued, running, completed, failed, cancelled
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.total_conversations = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.scenarios = {
+            scenario['key']: {
+                'key': scenario['key'],
+                'label': scenario['label'],
+                'month': scenario['month'],
+                'status': 'pending',
+                'messages': 0,
+                'error': None
+            }
+            for scenario in scenarios
+        }
+        self._lock = threading.Lock()
+
+    def on_progress(self, scenario: Dict, status: str, saved_count: int, error: str = None):
+        with self._lock:
+            entry = self.scenarios.get(scenario['key'])
+            if entry is not None:
+                entry['status'] = status
+                entry['messages'] = saved_count
+                entry['error'] = error
+
+    def first_failure(self) -> Optional[str]:
+        """The first failed scenario's error when no scenario completed, else None"""
+        with self._lock:
+            entries = sorted(self.scenarios.values(), key=lambda entry: entry['month'])
+        if any(entry['status'] == 'completed' for entry in entries):
+            return None
+        for entry in entries:
+            if entry['status'] == 'failed':
+                return f"{entry['label']}: {entry['error'] or 'generation failed'}"
+        return None
+
+    def mark_cancelled(self):
+        with self._lock:
+            self.status = 'cancelled'
+            for entry in self.scenarios.values():
+                if entry['status'] in ('pending', 'running'):
+                    entry['status'] = 'cancelled'
+
+    def elapsed_seconds(self) -> float:
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or datetime.utcnow()
+        return round((end - self.started_at).total_seconds(), 1)
+
+    def to_dict(self):
+        with self._lock:
+            scenarios = [dict(entry) for entry in self.scenarios.values()]
+        return {
+            'id': self.id,
+            'member_id': self.member_id,
+            'replace_months': self.replace_months,
+            'resume': self.resume,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'elapsed_seconds': self.elapsed_seconds(),
+            'messages_generated': sum(entry['messages'] for entry in scenarios),
+            'total_conversations': self.total_conversations,
+            'cancel_requested': self.cancel_event.is_set(),
+            'error': self.error,
+            'months': sorted(scenarios, key=lambda entry: entry['month'])
+        }
+
+
+class GenerationJobManager:
+    """Queue generation jobs and run them one at a time on a background thread.
+
+    Jobs are kept in memory for the lifetime of the process; a single worker
+    thread means concurrent clicks queue up instead of competing for Ollama.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, app, member_id: int, use_cache: bool = None,
+               replace_months: List[int] = None, resume: bool = False) -> GenerationJob:
+        scenarios = ElyxConversationGenerator(use_cache=False).get_scenarios(replace_months)
+        job = GenerationJob(member_id, scenarios, use_cache=use_cache,
+                            replace_months=replace_months, resume=resume)
+        with self._lock:
+            self._jobs[job.id] = job
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._drain, args=(app,),
+                                                name='elyx-generation-jobs', daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[GenerationJob]:
+        job = self.get(job_id)
+        if job is not None and job.status in ('queued', 'running'):
+            job.cancel_event.set()
+        return job
+
+    def _drain(self, app):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(app, job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, app, job: GenerationJob):
+        if job.cancel_event.is_set():
+            job.mark_cancelled()
+            job.finished_at = datetime.utcnow()
+            return
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        try:
+            with app.app_context():
+                generator = ElyxConversationGenerator(use_cache=job.use_cache)
+                job.total_conversations = generator.generate_full_dataset(
+                    job.member_id,
+                    progress=job.on_progress,
+                    cancel_event=job.cancel_event,
+                    replace_months=job.replace_months,
+                    resume=job.resume
+                )
+            if job.cancel_event.is_set():
+                job.mark_cancelled()
+            else:
+                # A run where every scenario failed is a failed job, not an empty success
+                job.error = job.first_failure()
+                job.status = 'failed' if job.error else 'completed'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+
+
+generation_jobs = GenerationJobManager()
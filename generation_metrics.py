@@ -0,0 +1,67 @@
+from typing import Dict, List
+
+from sqlalchemy import case, func
+
+from config import Config
+from generation_scheduler import get_concurrency_stats
+from models import db, OllamaCallStat
+
+
+def summarize_calls(*group_by: str) -> List[Dict]:
+    """Aggregate ``OllamaCallStat`` rows by the named columns.
+
+    Tokens per second is total generated tokens over total generation time,
+    a cold load is a call whose ``load_duration`` exceeds
+    ``OLLAMA_COLD_LOAD_SECONDS``, yield is messages parsed per 1,000
+    generated tokens, and tokens per stored message counts every generated
+    token against the messages that were actually new. Rates and averages
+    only count the rows that have the durations they divide by (cache hits
+    and older partial streams have none).
+    """
+    columns = [getattr(OllamaCallStat, name) for name in group_by]
+    cold_load_ns = Config.OLLAMA_COLD_LOAD_SECONDS * 1e9
+    rows = db.session.query(
+        *columns,
+        func.count(OllamaCallStat.id),
+        func.sum(case((OllamaCallStat.load_duration > cold_load_ns, 1), else_=0)),
+        func.coalesce(func.sum(OllamaCallStat.eval_count), 0),
+        func.coalesce(func.sum(case((OllamaCallStat.eval_duration > 0, OllamaCallStat.eval_count), else_=0)), 0),
+        func.coalesce(func.sum(OllamaCallStat.eval_duration), 0),
+        func.coalesce(func.sum(OllamaCallStat.prompt_eval_count), 0),
+        func.coalesce(func.sum(OllamaCallStat.prompt_eval_duration), 0),
+        func.count(OllamaCallStat.prompt_eval_duration),
+        func.coalesce(func.sum(OllamaCallStat.total_duration), 0),
+        func.count(OllamaCallStat.total_duration),
+        func.coalesce(func.sum(OllamaCallStat.messages_parsed), 0),
+        func.coalesce(func.sum(OllamaCallStat.messages_saved), 0)
+    ).group_by(*columns).order_by(*columns).all()
+
+    summaries = []
+    for row in rows:
+        keys = dict(zip(group_by, row[:len(group_by)]))
+        (calls, cold_loads, eval_count, timed_eval_count, eval_duration, prompt_eval_count,
+         prompt_eval_duration, prompt_eval_calls, total_duration, total_calls, messages, saved) = row[len(group_by):]
+        summaries.append(dict(
+            keys,
+            calls=calls,
+            cold_loads=cold_loads,
+            eval_tokens=eval_count,
+            tokens_per_second=round(timed_eval_count / (eval_duration / 1e9), 1) if eval_duration else None,
+            prompt_tokens=prompt_eval_count,
+            avg_prompt_eval_ms=round(prompt_eval_duration / 1e6 / prompt_eval_calls, 1) if prompt_eval_calls else None,
+            avg_total_seconds=round(total_duration / 1e9 / total_calls, 2) if total_calls else None,
+            messages_parsed=messages,
+            messages_per_1k_tokens=round(messages / (eval_count / 1000), 2) if eval_count else None,
+            messages_saved=saved,
+            tokens_per_stored_message=round(eval_count / saved, 1) if saved else None
+        ))
+    return summaries
+
+
+def get_generation_metrics() -> Dict:
+    return {
+        'by_model': summarize_calls('model'),
+        'by_model_and_scenario': summarize_calls('model', 'scenario'),
+        'by_output_format': summarize_calls('model', 'output_format'),
+        'concurrency': get_concurrency_stats()
+    }
@@ -0,0 +1,218 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.orm import aliased
+
+from config import Config
+from conversation_generator import ElyxConversationGenerator
+from models import db, Member, GenerationTask
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+def get_scenario_graph() -> Dict[str, List[str]]:
+    """Scenario key -> keys it depends on"""
+    return {scenario['key']: scenario['depends_on']
+            for scenario in ElyxConversationGenerator(use_cache=False).get_scenarios()}
+
+
+def enqueue_member(member_id: int, scenario_keys: Iterable[str] = None) -> int:
+    """Queue one task per scenario for ``member_id``.
+
+    Scenarios that already have a pending or running task are left alone.
+    Returns the number of tasks created.
+    """
+    graph = get_scenario_graph()
+    keys = list(scenario_keys) if scenario_keys is not None else list(graph)
+    unknown = [key for key in keys if key not in graph]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {unknown}")
+
+    active = {scenario for (scenario,) in db.session.query(GenerationTask.scenario).filter(
+        GenerationTask.member_id == member_id,
+        GenerationTask.status.in_(ACTIVE_STATUSES)
+    )}
+    created = 0
+    for key in keys:
+        if key not in active:
+            db.session.add(GenerationTask(member_id=member_id, scenario=key, status='pending'))
+            created += 1
+    db.session.commit()
+    return created
+
+
+def enqueue_all_members() -> int:
+    return sum(enqueue_member(member_id) for (member_id,) in db.session.query(Member.id).all())
+
+
+def claim_task(worker_id: str, lease_seconds: int = None) -> Optional[GenerationTask]:
+    """Lease the oldest runnable task to ``worker_id``.
+
+    A task is runnable when it is pending, or running with an expired lease,
+    and none of the scenarios it depends on are still pending or running for
+    the same member. The lease is taken with a conditional UPDATE so two
+    workers can never claim the same task.
+    """
+    lease_seconds = lease_seconds or Config.GENERATION_LEASE_SECONDS
+    graph = get_scenario_graph()
+    now = datetime.utcnow()
+
+    # Blocked tasks are filtered out in SQL, before the LIMIT, so a backlog of
+    # dependents waiting on running tasks can't hide runnable ones
+    blocker = aliased(GenerationTask)
+    dependencies = [and_(GenerationTask.scenario == scenario, blocker.scenario.in_(depends_on))
+                    for scenario, depends_on in graph.items() if depends_on]
+    candidates_query = GenerationTask.query.filter(or_(
+        GenerationTask.status == 'pending',
+        and_(GenerationTask.status == 'running', GenerationTask.lease_expires_at < now)
+    ))
+    if dependencies:
+        candidates_query = candidates_query.filter(~exists().where(
+            blocker.member_id == GenerationTask.member_id,
+            blocker.status.in_(ACTIVE_STATUSES),
+            or_(blocker.lease_expires_at.is_(None), blocker.lease_expires_at >= now),
+            or_(*dependencies)
+        ))
+    candidates = candidates_query.order_by(GenerationTask.id).limit(50).all()
+
+    for task in candidates:
+        claimed = GenerationTask.query.filter(
+            GenerationTask.id == task.id,
+            or_(
+                GenerationTask.status == 'pending',
+                and_(GenerationTask.status == 'running', GenerationTask.lease_expires_at < now)
+            )
+        ).update({
+            'status': 'running',
+            'lease_owner': worker_id,
+            'lease_expires_at': now + timedelta(seconds=lease_seconds),
+            'heartbeat_at': now,
+            'attempts': GenerationTask.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(GenerationTask, task.id)
+
+    db.session.rollback()
+    return None
+
+
+def renew_lease(task_id: int, worker_id: str, lease_seconds: int = None) -> bool:
+    """Extend a lease; False means another worker has reclaimed the task"""
+    lease_seconds = lease_seconds or Config.GENERATION_LEASE_SECONDS
+    now = datetime.utcnow()
+    renewed = GenerationTask.query.filter_by(id=task_id, lease_owner=worker_id, status='running').update({
+        'lease_expires_at': now + timedelta(seconds=lease_seconds),
+        'heartbeat_at': now
+    }, synchronize_session=False)
+    db.session.commit()
+    return bool(renewed)
+
+
+def finish_task(task_id: int, worker_id: str, succeeded: bool, message_count: int = 0,
+                error: str = None, max_attempts: int = None):
+    """Record the outcome of a claimed task; failures are retried up to ``max_attempts``"""
+    max_attempts = max_attempts or Config.GENERATION_MAX_ATTEMPTS
+    task = GenerationTask.query.filter_by(id=task_id, lease_owner=worker_id).first()
+    if task is None:
+        db.session.rollback()
+        return
+
+    task.message_count = message_count
+    task.error = error
+    task.lease_owner = None
+    task.lease_expires_at = None
+    if succeeded:
+        task.status = 'completed'
+        task.finished_at = datetime.utcnow()
+    elif task.attempts < max_attempts:
+        task.status = 'pending'
+    else:
+        task.status = 'failed'
+        task.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def has_active_tasks() -> bool:
+    return db.session.query(GenerationTask.query.filter(
+        GenerationTask.status.in_(ACTIVE_STATUSES)).exists()).scalar()
+
+
+def queue_status() -> Dict[str, int]:
+    counts = db.session.query(GenerationTask.status, db.func.count(GenerationTask.id)) \
+        .group_by(GenerationTask.status).all()
+    return {status: count for status, count in counts}
+
+
+class GenerationWorker:
+    """Drain the generation queue, one leased member x scenario task at a time.
+
+    A heartbeat thread keeps the lease alive while Ollama is generating; if
+    the lease is lost to another worker the running scenario is cancelled.
+    """
+
+    def __init__(self, app, worker_id: str = None, base_url: str = None,
+                 lease_seconds: int = None, poll_interval: float = 5.0):
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.base_url = base_url
+        self.lease_seconds = lease_seconds or Config.GENERATION_LEASE_SECONDS
+        self.poll_interval = poll_interval
+
+    def run(self, exit_when_empty: bool = False):
+        print(f"👷 Generation worker {self.worker_id} started")
+        while True:
+            with self.app.app_context():
+                task = claim_task(self.worker_id, self.lease_seconds)
+                if task is not None:
+                    self.run_task(task.id, task.member_id, task.scenario)
+                    continue
+                has_work = has_active_tasks()
+            if exit_when_empty and not has_work:
+                print(f"👷 Generation worker {self.worker_id} found no work, exiting")
+                return
+            time.sleep(self.poll_interval)
+
+    def run_task(self, task_id: int, member_id: int, scenario_key: str):
+        print(f"👷 {self.worker_id} running task {task_id}: member {member_id}, {scenario_key}")
+        outcome = {'status': None, 'messages': 0, 'error': None}
+        lease_lost = threading.Event()
+        stop_heartbeat = threading.Event()
+
+        def on_progress(scenario, status, saved_count, error):
+            outcome['status'] = status
+            outcome['messages'] = saved_count
+            outcome['error'] = error
+
+        def heartbeat():
+            while not stop_heartbeat.wait(self.lease_seconds / 3):
+                with self.app.app_context():
+                    if not renew_lease(task_id, self.worker_id, self.lease_seconds):
+                        print(f"   ⚠️ Lease on task {task_id} lost, cancelling")
+                        lease_lost.set()
+                        return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, name=f'elyx-lease-{task_id}', daemon=True)
+        heartbeat_thread.start()
+        error = None
+        try:
+            generator = ElyxConversationGenerator(base_url=self.base_url)
+            generator.generate_full_dataset(member_id, max_concurrency=1, progress=on_progress,
+                                            cancel_event=lease_lost, scenario_keys=[scenario_key])
+        except Exception as e:
+            error = str(e)
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+
+        if lease_lost.is_set():
+            return
+        succeeded = error is None and outcome['status'] == 'completed'
+        if not succeeded and error is None:
+            error = outcome['error'] or f"Scenario finished as {outcome['status']}"
+        finish_task(task_id, self.worker_id, succeeded, outcome['messages'], error)
@@ -0,0 +1,214 @@
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent LLM calls.
+
+    Every healthy call adds ``1 / limit``, so a full window of successes
+    raises the limit by one. A timeout or 429/5xx, or a call whose seconds
+    per generated token inflate past ``latency_tolerance`` times the best
+    seen (or whose tokens per second drop by the same factor), multiplies
+    the limit by ``decrease_factor``. Calls that started before the last
+    decrease cannot trigger another one, so a single overload episode only
+    halves the limit once.
+    """
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 16,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0, name: str = None):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.baseline_latency = None
+        self.baseline_tokens_per_second = None
+        self.increases = 0
+        self.decreases = 0
+        self.last_decrease_reason = None
+        self._last_decrease_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> int:
+        with self._lock:
+            return int(math.floor(self.limit))
+
+    def record_success(self, started_at: float, latency: float, eval_count: int = None,
+                       tokens_per_second: float = None):
+        """Feed back one finished call; ``started_at`` is its ``time.monotonic()`` start"""
+        with self._lock:
+            reason = None
+            if eval_count:
+                latency_per_token = latency / eval_count
+                if self.baseline_latency is None or latency_per_token < self.baseline_latency:
+                    self.baseline_latency = latency_per_token
+                elif latency_per_token > self.baseline_latency * self.latency_tolerance:
+                    reason = f"latency {latency_per_token * 1000:.1f} ms/token"
+                else:
+                    # Drift slowly so a different model or host becomes the new normal
+                    self.baseline_latency += 0.05 * (latency_per_token - self.baseline_latency)
+            if tokens_per_second:
+                if self.baseline_tokens_per_second is None or tokens_per_second > self.baseline_tokens_per_second:
+                    self.baseline_tokens_per_second = tokens_per_second
+                elif tokens_per_second < self.baseline_tokens_per_second / self.latency_tolerance:
+                    reason = reason or f"{tokens_per_second:.1f} tokens/s"
+                else:
+                    self.baseline_tokens_per_second += 0.05 * (tokens_per_second - self.baseline_tokens_per_second)
+
+            if reason is not None:
+                self._decrease(started_at, reason)
+            elif self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self.increases += 1
+
+    def record_overload(self, started_at: float, reason: str):
+        """Feed back a call that timed out or got a 429/5xx"""
+        with self._lock:
+            self._decrease(started_at, reason)
+
+    def _decrease(self, started_at: float, reason: str):
+        if started_at < self._last_decrease_at:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self.decreases += 1
+        self.last_decrease_reason = reason
+        self._last_decrease_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'name': self.name,
+                'limit': int(math.floor(self.limit)),
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'baseline_ms_per_token': round(self.baseline_latency * 1000, 2) if self.baseline_latency else None,
+                'baseline_tokens_per_second': round(self.baseline_tokens_per_second, 1)
+                if self.baseline_tokens_per_second else None,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'last_decrease_reason': self.last_decrease_reason
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(name: str) -> AdaptiveConcurrencyLimiter:
+    """Process-wide limiter per Ollama target, so what one run learns carries over"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(Config.GENERATION_CONCURRENCY,
+                                                 max_limit=Config.GENERATION_MAX_CONCURRENCY,
+                                                 name=name)
+            _limiters[name] = limiter
+        return limiter
+
+
+def get_concurrency_stats() -> List[Dict]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.stats() for limiter in limiters]
+
+
+class GenerationScheduler:
+    """Run a dependency graph of generation scenarios concurrently.
+
+    Each node is a dict with a unique ``key`` and an optional ``depends_on``
+    list of keys. A node is started once every node it depends on has
+    finished (successfully or not), with at most ``max_workers`` nodes in
+    flight, or ``limiter.current`` when an adaptive limiter is given. ``work(node, report)`` runs on a worker thread and may call
+    ``report(payload)`` any number of times to hand partial results back.
+    ``on_start``, ``on_progress`` and ``on_complete`` always run on the
+    thread that called ``run`` so database writes stay in its app context.
+    Once ``cancel_event`` is set no further nodes are started; nodes already
+    in flight are allowed to finish.
+    """
+
+    def __init__(self, max_workers: int = 3, limiter: AdaptiveConcurrencyLimiter = None):
+        self.limiter = limiter
+        self.max_workers = limiter.max_limit if limiter is not None else max(1, int(max_workers))
+
+    def run(self, nodes: List[Dict],
+            work: Callable[[Dict, Callable[[Any], None]], Any],
+            on_complete: Callable[[Dict, Any, Optional[Exception]], None],
+            on_progress: Optional[Callable[[Dict, Any], None]] = None,
+            on_start: Optional[Callable[[Dict], None]] = None,
+            cancel_event: Optional[threading.Event] = None):
+        self.validate(nodes)
+
+        pending = {node['key']: node for node in nodes}
+        finished = set()
+        in_flight = 0
+        results = queue.Queue()
+
+        def _run(node):
+            def report(payload):
+                results.put(('progress', node, payload, None))
+
+            try:
+                results.put(('done', node, work(node, report), None))
+            except Exception as e:
+                results.put(('done', node, None, e))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='elyx-generation') as executor:
+            while pending or in_flight:
+                if cancel_event is not None and cancel_event.is_set():
+                    pending.clear()
+                    if not in_flight:
+                        break
+
+                limit = self.limiter.current if self.limiter is not None else self.max_workers
+                # Keep the caller's ordering among ready nodes
+                for node in list(pending.values()):
+                    if in_flight >= limit:
+                        break
+                    if all(dep in finished for dep in node.get('depends_on', [])):
+                        del pending[node['key']]
+                        if on_start is not None:
+                            on_start(node)
+                        executor.submit(_run, node)
+                        in_flight += 1
+
+                kind, node, result, error = results.get()
+                if kind == 'progress':
+                    if on_progress is not None:
+                        on_progress(node, result)
+                    continue
+
+                in_flight -= 1
+                finished.add(node['key'])
+                on_complete(node, result, error)
+
+    @staticmethod
+    def validate(nodes: List[Dict]):
+        """Reject duplicate keys, unknown dependencies and cycles"""
+        keys = [node['key'] for node in nodes]
+        if len(keys) != len(set(keys)):
+            raise ValueError("Duplicate scenario keys in generation graph")
+
+        graph = {node['key']: list(node.get('depends_on', [])) for node in nodes}
+        for key, deps in graph.items():
+            unknown = [dep for dep in deps if dep not in graph]
+            if unknown:
+                raise ValueError(f"Scenario '{key}' depends on unknown scenarios: {unknown}")
+
+        resolved = set()
+        remaining = dict(graph)
+        while remaining:
+            ready = [key for key, deps in remaining.items() if all(dep in resolved for dep in deps)]
+            if not ready:
+                raise ValueError(f"Dependency cycle between scenarios: {sorted(remaining)}")
+            for key in ready:
+                resolved.add(key)
+                del remaining[key]
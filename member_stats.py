@@ -0,0 +1,192 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import case, func, or_
+
+from models import db, Member, Conversation, TimelineEvent, Decision, MemberStats, chunked
+
+
+def refresh_member_stats(member_ids: Iterable[int] = None) -> int:
+    """Recompute the ``member_stats`` rows of ``member_ids`` (every member when None).
+
+    The counts are aggregated from the members' conversations, timeline
+    events and decisions through the session, so rows written earlier in
+    the same transaction are included, and nothing is committed: callers
+    refresh right before their own commit and the counters land atomically
+    with the writes they describe. Every aggregate is served by a
+    ``(member_id, ...)`` index. Returns the number of members refreshed.
+    """
+    if member_ids is None:
+        return _refresh(None)
+    return sum(_refresh(chunk) for chunk in chunked(sorted(set(member_ids))))
+
+
+def unseen_team_members(member_id: int, team_member_ids: Iterable[int]) -> Set[int]:
+    """The team members in ``team_member_ids`` with no conversation stored for ``member_id`` yet.
+
+    Called before a batch is inserted, so ``add_conversations`` knows
+    whether the distinct team member count can change.
+    """
+    team_member_ids = {team_member_id for team_member_id in team_member_ids if team_member_id is not None}
+    if not team_member_ids:
+        return set()
+    seen = {team_member_id for (team_member_id,) in db.session.query(Conversation.team_member_id).filter(
+        Conversation.member_id == member_id,
+        Conversation.team_member_id.in_(team_member_ids)
+    ).distinct()}
+    return team_member_ids - seen
+
+
+def add_conversations(member_id: int, inserted: int, first_timestamp: datetime, last_timestamp: datetime,
+                      new_team_members: bool = False):
+    """Count ``inserted`` new conversations into the member's ``member_stats`` row.
+
+    The counter is incremented and the activity range widened in one
+    ``UPDATE``, which also locks the row until the caller commits, so
+    concurrent saves can't lose each other's increments. The distinct team
+    member count is only recounted when ``unseen_team_members`` found a
+    new one. The cost doesn't depend on how many conversations the member
+    already has. A member without a row gets a full ``refresh_member_stats``.
+    """
+    if not inserted:
+        return
+    first_day, last_day = _as_date(first_timestamp), _as_date(last_timestamp)
+    table = MemberStats.__table__
+    statement = table.update().where(table.c.member_id == member_id).values(
+        conversation_count=table.c.conversation_count + inserted,
+        first_activity=case(
+            (or_(table.c.first_activity.is_(None), table.c.first_activity > first_day), first_day),
+            else_=table.c.first_activity),
+        last_activity=case(
+            (or_(table.c.last_activity.is_(None), table.c.last_activity < last_day), last_day),
+            else_=table.c.last_activity),
+        updated_at=datetime.utcnow()
+    )
+    columns = (table.c.first_activity, table.c.last_activity, table.c.days_in_program)
+    connection = db.session.connection()
+    if db.engine.dialect.update_returning:
+        row = connection.execute(statement.returning(*columns)).first()
+    else:
+        # Without RETURNING, read the widened range back once the UPDATE has matched the row
+        row = None
+        if connection.execute(statement).rowcount:
+            row = connection.execute(
+                table.select().with_only_columns(*columns).where(table.c.member_id == member_id)).first()
+    if row is None:
+        refresh_member_stats([member_id])
+        return
+
+    values = {}
+    days_in_program = (row.last_activity - row.first_activity).days + 1
+    if days_in_program != row.days_in_program:
+        values['days_in_program'] = days_in_program
+    if new_team_members:
+        values['team_member_count'] = db.session.query(func.count(func.distinct(Conversation.team_member_id))).filter(
+            Conversation.member_id == member_id,
+            Conversation.team_member_id.isnot(None)
+        ).scalar()
+    if values:
+        connection.execute(table.update().where(table.c.member_id == member_id).values(**values))
+
+
+def rebuild_member_stats() -> int:
+    """Recompute every member's stats and commit, for backfills and repairs"""
+    try:
+        refreshed = refresh_member_stats()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return refreshed
+
+
+def get_member_stats(member_id: int = None) -> Optional[MemberStats]:
+    """A member's stats row (the first member's when ``member_id`` is None).
+
+    One primary-key read in the common case. A member without a row yet
+    (created by an older version, before any write refreshed it) gets one
+    computed and committed here. Returns None when the member doesn't exist.
+    """
+    if member_id is None:
+        stats = MemberStats.query.order_by(MemberStats.member_id).first()
+    else:
+        stats = db.session.get(MemberStats, member_id)
+    if stats is not None:
+        return stats
+
+    if member_id is None:
+        member = db.session.query(Member.id).order_by(Member.id).first()
+    else:
+        member = db.session.query(Member.id).filter(Member.id == member_id).first()
+    if member is None:
+        return None
+    refresh_member_stats([member.id])
+    db.session.commit()
+    return db.session.get(MemberStats, member.id)
+
+
+def _refresh(member_ids: Optional[List[int]]) -> int:
+    conversations = _grouped(db.session.query(
+        Conversation.member_id,
+        func.count(Conversation.id),
+        func.min(Conversation.timestamp),
+        func.max(Conversation.timestamp)
+    ), Conversation.member_id, member_ids)
+    team_members = _grouped(db.session.query(
+        Conversation.member_id,
+        func.count(func.distinct(Conversation.team_member_id))
+    ).filter(Conversation.team_member_id.isnot(None)), Conversation.member_id, member_ids)
+    events = _grouped(db.session.query(
+        TimelineEvent.member_id,
+        func.count(TimelineEvent.id),
+        func.coalesce(func.sum(case((TimelineEvent.status == 'breakthrough', 1), else_=0)), 0),
+        func.min(TimelineEvent.date),
+        func.max(TimelineEvent.date)
+    ), TimelineEvent.member_id, member_ids)
+    decisions = _grouped(db.session.query(
+        Decision.member_id,
+        func.min(Decision.date),
+        func.max(Decision.date)
+    ), Decision.member_id, member_ids)
+
+    member_query = db.session.query(Member.id)
+    stats_query = MemberStats.query
+    if member_ids is not None:
+        member_query = member_query.filter(Member.id.in_(member_ids))
+        stats_query = stats_query.filter(MemberStats.member_id.in_(member_ids))
+    existing = {stats.member_id: stats for stats in stats_query}
+
+    now = datetime.utcnow()
+    refreshed = 0
+    for (member_id,) in member_query:
+        conversation_count, first_message, last_message = conversations.get(member_id, (0, None, None))
+        event_count, breakthrough_count, first_event, last_event = events.get(member_id, (0, 0, None, None))
+        first_decision, last_decision = decisions.get(member_id, (None, None))
+        activity = [_as_date(value) for value in (first_message, last_message, first_event,
+                                                  last_event, first_decision, last_decision) if value]
+
+        stats = existing.get(member_id)
+        if stats is None:
+            stats = MemberStats(member_id=member_id)
+            db.session.add(stats)
+        stats.conversation_count = conversation_count
+        stats.event_count = event_count
+        stats.breakthrough_count = breakthrough_count
+        stats.team_member_count = team_members.get(member_id, (0,))[0]
+        stats.first_activity = min(activity) if activity else None
+        stats.last_activity = max(activity) if activity else None
+        # Counting both ends, so a member active on a single day is on day 1
+        stats.days_in_program = (stats.last_activity - stats.first_activity).days + 1 if activity else 0
+        stats.updated_at = now
+        refreshed += 1
+    return refreshed
+
+
+def _grouped(query, member_column, member_ids: Optional[List[int]]) -> Dict[int, tuple]:
+    if member_ids is not None:
+        query = query.filter(member_column.in_(member_ids))
+    return {row[0]: tuple(row[1:]) for row in query.group_by(member_column)}
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
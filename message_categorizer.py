@@ -0,0 +1,74 @@
+import json
+from typing import Iterable, List, Sequence, Tuple
+
+from config import Config
+
+
+def load_category_rules(path: str = None) -> List[Tuple[str, List[str]]]:
+    """Keyword rules in priority order, from a JSON file or ``Config``.
+
+    The file holds a list of ``[category, [keyword, ...]]`` pairs; the first
+    category with a keyword in the message wins.
+    """
+    path = path or Config.MESSAGE_CATEGORY_RULES_FILE
+    if path:
+        with open(path, encoding='utf-8') as f:
+            rules = json.load(f)
+    else:
+        rules = Config.MESSAGE_CATEGORY_RULES
+    return [(category, list(keywords)) for category, keywords in rules]
+
+
+class MessageCategorizer:
+    """Assign each message the highest-priority category whose keyword it contains.
+
+    Rules are flattened once into a priority-ordered ``(keyword, category)``
+    table, so a message is lower-cased once and checked with plain substring
+    tests until the first hit. Messages without a keyword fall back to
+    ``member_category`` for the member and ``default_category`` otherwise.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Iterable[str]]] = None,
+                 member_sender: str = None,
+                 member_category: str = 'member_inquiry',
+                 default_category: str = 'team_response'):
+        rules = load_category_rules() if rules is None else rules
+        self.member_sender = member_sender or Config.MEMBER_NAME
+        self.member_category = member_category
+        self.default_category = default_category
+        self._keywords = tuple(
+            (keyword.lower(), category)
+            for category, keywords in rules
+            for keyword in keywords
+        )
+
+    def categorize(self, message: str, sender: str) -> str:
+        message_lower = message.lower()
+        for keyword, category in self._keywords:
+            if keyword in message_lower:
+                return category
+        if sender == self.member_sender:
+            return self.member_category
+        return self.default_category
+
+    def categorize_batch(self, messages: Sequence[str], senders: Sequence[str]) -> List[str]:
+        """Categorize ``messages[i]`` sent by ``senders[i]`` for every i"""
+        if len(messages) != len(senders):
+            raise ValueError("messages and senders must be the same length")
+
+        keywords = self._keywords
+        member_sender = self.member_sender
+        member_category = self.member_category
+        default_category = self.default_category
+
+        categories = []
+        append = categories.append
+        for message, sender in zip(messages, senders):
+            message_lower = message.lower()
+            for keyword, category in keywords:
+                if keyword in message_lower:
+                    append(category)
+                    break
+            else:
+                append(member_category if sender == member_sender else default_category)
+        return categories
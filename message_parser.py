@@ -0,0 +1,214 @@
+import json
+import re
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dateutil.parser import parse as parse_datetime
+
+# One pass per line: the bracketed timestamp (with the usual
+# ``DD/MM/YY, HH:MM AM/PM`` form split into groups), the sender up to the
+# first colon, and the message text.
+LINE_PATTERN = re.compile(
+    r'^[ \t]*\[[ \t]*'
+    r'(?P<timestamp>'
+    r'(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{4}|\d{2}),[ \t]*'
+    r'(?P<hour>\d{1,2}):(?P<minute>\d{2})[ \t]*(?P<ampm>[AaPp])\.?[Mm]\.?'
+    r'|[^\]\n]*?)'
+    r'[ \t]*\][ \t]*(?P<sender>[^:\n]*?)[ \t]*:[ \t]*(?P<message>[^\n]*?)[ \t\r]*$',
+    re.MULTILINE
+)
+
+# Whitespace and commas between array items
+JSON_SEPARATOR = re.compile(r'[\s,]*')
+
+# Ollama ``format`` schema for structured generation: one object per message
+MESSAGES_JSON_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'messages': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'timestamp': {'type': 'string'},
+                    'sender': {'type': 'string'},
+                    'message': {'type': 'string'}
+                },
+                'required': ['timestamp', 'sender', 'message']
+            }
+        }
+    },
+    'required': ['messages']
+}
+
+FALLBACK_FORMATS = (
+    '%d/%m/%y, %H:%M',
+    '%d/%m/%Y, %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %I:%M %p',
+)
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Parse a timestamp the LLM wrote in something other than the usual format.
+
+    Tries a few ``strptime`` formats before handing over to dateutil, and
+    returns None rather than guessing when nothing understands the value.
+    """
+    value = value.strip()
+    for fmt in FALLBACK_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    try:
+        return parse_datetime(value, dayfirst=True)
+    except (ValueError, OverflowError):
+        return None
+
+
+def salvage_json_messages(text: str) -> List:
+    """The complete objects at the start of a truncated JSON messages array"""
+    start = text.find('[')
+    if start < 0:
+        return []
+    decoder = json.JSONDecoder()
+    items = []
+    position = start + 1
+    while True:
+        position = JSON_SEPARATOR.match(text, position).end()
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except ValueError:
+            return items
+        items.append(item)
+
+
+class WhatsAppLineParser:
+    """Parse ``[DD/MM/YY, HH:MM AM/PM] Sender: message`` transcripts.
+
+    Produces message dicts with a ``datetime`` timestamp, the display sender
+    and role, and the message category (None without ``categorize``, for
+    callers that categorize in bulk). Lines whose timestamp cannot be
+    understood are dropped and counted in ``rejected``.
+    """
+
+    def __init__(self, sender_mapping: Dict[str, str], role_mapping: Dict[str, str],
+                 categorize: Optional[Callable[[str, str], str]] = None, default_role: str = 'Team Member'):
+        self.role_mapping = role_mapping
+        self.categorize = categorize
+        self.default_role = default_role
+        self.rejected = 0
+        # raw sender as written by the LLM -> (display sender, role)
+        self._senders = {}
+        for raw, display in sender_mapping.items():
+            self._senders[raw] = (display, role_mapping.get(display, default_role))
+        for display, role in role_mapping.items():
+            self._senders.setdefault(display, (display, role))
+
+    def resolve_sender(self, raw_sender: str) -> Tuple[str, str]:
+        resolved = self._senders.get(raw_sender)
+        if resolved is None:
+            sender = raw_sender
+            # Clean sender name, e.g. "Ruby (Concierge)"
+            if '(' in sender and ')' in sender:
+                sender = sender.split('(')[0].strip()
+            resolved = self._senders.get(sender)
+            if resolved is None:
+                resolved = (sender, self.role_mapping.get(sender, self.default_role))
+            self._senders[raw_sender] = resolved
+        return resolved
+
+    def parse(self, text: str, month: int = None) -> List[Dict]:
+        conversations = []
+        month = month or 1
+        for match in LINE_PATTERN.finditer(text):
+            conversation = self._build(match, month)
+            if conversation is not None:
+                conversations.append(conversation)
+        return conversations
+
+    def parse_json(self, text: str, month: int = None) -> List[Dict]:
+        """Parse a ``MESSAGES_JSON_SCHEMA`` response (or a bare list of messages).
+
+        Objects without a usable timestamp, sender or message are dropped
+        and counted in ``rejected``. A document cut off part way (by
+        ``num_predict``) keeps the messages completed before the cut, and
+        the cut-off one counts as a rejection, as does a response that is
+        not JSON at all.
+        """
+        try:
+            data = json.loads(text)
+        except ValueError:
+            self.rejected += 1
+            data = salvage_json_messages(text)
+            if not data:
+                return []
+        items = data.get('messages', []) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            self.rejected += 1
+            return []
+
+        conversations = []
+        month = month or 1
+        for item in items:
+            if not isinstance(item, dict):
+                self.rejected += 1
+                continue
+            raw_timestamp = str(item.get('timestamp') or '').strip()
+            raw_sender = str(item.get('sender') or '').strip()
+            message = str(item.get('message') or '').strip()
+            try:
+                timestamp = datetime.fromisoformat(raw_timestamp)
+            except ValueError:
+                timestamp = parse_timestamp(raw_timestamp) if raw_timestamp else None
+            if timestamp is None or not raw_sender or not message:
+                self.rejected += 1
+                continue
+
+            sender, role = self.resolve_sender(raw_sender)
+            conversations.append({
+                'timestamp': timestamp,
+                'sender': sender,
+                'sender_role': role,
+                'message': message,
+                'category': self.categorize(message, sender) if self.categorize else None,
+                'month': month
+            })
+        return conversations
+
+    def parse_line(self, line: str, month: int = None) -> Optional[Dict]:
+        match = LINE_PATTERN.match(line)
+        if match is None:
+            return None
+        return self._build(match, month or 1)
+
+    def _build(self, match, month: int) -> Optional[Dict]:
+        raw_timestamp, day, month_num, year, hour, minute, ampm, raw_sender, message = match.groups()
+
+        timestamp = None
+        if day is not None:
+            year = int(year)
+            hour = int(hour) % 12
+            if ampm in 'Pp':
+                hour += 12
+            try:
+                timestamp = datetime(year + 2000 if year < 100 else year,
+                                     int(month_num), int(day), hour, int(minute))
+            except ValueError:
+                timestamp = None
+        if timestamp is None:
+            timestamp = parse_timestamp(raw_timestamp)
+            if timestamp is None:
+                self.rejected += 1
+                return None
+
+        sender, role = self._senders.get(raw_sender) or self.resolve_sender(raw_sender)
+        return {
+            'timestamp': timestamp,
+            'sender': sender,
+            'sender_role': role,
+            'message': message,
+            'category': self.categorize(message, sender) if self.categorize else None,
+            'month': month
+        }
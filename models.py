@@ -1,9 +1,19 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
+import hashlib
 
 db = SQLAlchemy()
 
+def chunked(ids, size=500):
+    """Split ``ids`` into lists of at most ``size``, for ``IN (...)`` filters.
+
+    Keeps each statement well under SQLite's bound-parameter limit.
+    """
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
 class Member(db.Model):
     __tablename__ = 'members'
 
@@ -42,6 +52,9 @@ class Member(db.Model):
 
 class TeamMember(db.Model):
     __tablename__ = 'team_members'
+    __table_args__ = (
+        db.Index('ix_team_members_name', 'name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -63,6 +76,13 @@ class TeamMember(db.Model):
 
 class Conversation(db.Model):
     __tablename__ = 'conversations'
+    __table_args__ = (
+        db.Index('ux_conversations_content_hash', 'content_hash', unique=True),
+        db.Index('ix_conversations_member_month', 'member_id', 'month'),
+        db.Index('ix_conversations_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_conversations_member_timestamp_id', 'member_id', 'timestamp', 'id'),
+        db.Index('ix_conversations_member_team_member', 'member_id', 'team_member_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     member_id = db.Column(db.Integer, db.ForeignKey('members.id'), nullable=False)
@@ -72,6 +92,14 @@ class Conversation(db.Model):
     category = db.Column(db.String(50), nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False)
     month = db.Column(db.Integer, nullable=False)
+    content_hash = db.Column(db.String(64))  # natural key, see compute_content_hash
+    model = db.Column(db.String(100))  # Ollama model that generated the message
+
+    @staticmethod
+    def compute_content_hash(member_id, timestamp, sender, message):
+        """SHA-256 over (member_id, timestamp, sender, message)"""
+        material = '\x1f'.join([str(member_id), timestamp.isoformat(), sender, message])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
 
     def to_dict(self):
         return {
@@ -82,11 +110,18 @@ class Conversation(db.Model):
             'message': self.message,
             'category': self.category,
             'timestamp': self.timestamp.isoformat(),
-            'month': self.month
+            'month': self.month,
+            'model': self.model
         }
 
 class TimelineEvent(db.Model):
     __tablename__ = 'timeline_events'
+    __table_args__ = (
+        db.Index('ix_timeline_events_date', 'date'),
+        db.Index('ix_timeline_events_category_date', 'category', 'date'),
+        db.Index('ix_timeline_events_member_date', 'member_id', 'date'),
+        db.Index('ix_timeline_events_member_category_date', 'member_id', 'category', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     member_id = db.Column(db.Integer, db.ForeignKey('members.id'), nullable=False)
@@ -119,6 +154,10 @@ class TimelineEvent(db.Model):
 
 class HealthMetric(db.Model):
     __tablename__ = 'health_metrics'
+    __table_args__ = (
+        db.Index('ix_health_metrics_date', 'date'),
+        db.Index('ix_health_metrics_member_type_date', 'member_id', 'metric_type', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     member_id = db.Column(db.Integer, db.ForeignKey('members.id'), nullable=False)
@@ -137,6 +176,10 @@ class HealthMetric(db.Model):
 
 class Decision(db.Model):
     __tablename__ = 'decisions'
+    __table_args__ = (
+        db.Index('ix_decisions_date', 'date'),
+        db.Index('ix_decisions_member_date', 'member_id', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     member_id = db.Column(db.Integer, db.ForeignKey('members.id'), nullable=False)
@@ -163,6 +206,9 @@ class Decision(db.Model):
 
 class TeamMetric(db.Model):
     __tablename__ = 'team_metrics'
+    __table_args__ = (
+        db.Index('ix_team_metrics_team_member', 'team_member_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     team_member_id = db.Column(db.Integer, db.ForeignKey('team_members.id'), nullable=False)
@@ -176,3 +222,157 @@ class TeamMetric(db.Model):
             'hours': self.hours,
             'metric_type': self.metric_type
         }
+
+class MemberStats(db.Model):
+    """Dashboard counters per member, kept current by the write paths (see member_stats.py)"""
+    __tablename__ = 'member_stats'
+
+    member_id = db.Column(db.Integer, db.ForeignKey('members.id'), primary_key=True)
+    conversation_count = db.Column(db.Integer, nullable=False, default=0)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    breakthrough_count = db.Column(db.Integer, nullable=False, default=0)
+    team_member_count = db.Column(db.Integer, nullable=False, default=0)
+    first_activity = db.Column(db.Date)
+    last_activity = db.Column(db.Date)
+    days_in_program = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'member_id': self.member_id,
+            'total_conversations': self.conversation_count,
+            'total_events': self.event_count,
+            'breakthroughs': self.breakthrough_count,
+            'team_members': self.team_member_count,
+            'days_in_program': self.days_in_program,
+            'first_activity': self.first_activity.isoformat() if self.first_activity else None,
+            'last_activity': self.last_activity.isoformat() if self.last_activity else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class GenerationCheckpoint(db.Model):
+    __tablename__ = 'generation_checkpoints'
+    __table_args__ = (
+        db.UniqueConstraint('member_id', 'scenario', name='ux_generation_checkpoints_member_scenario'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    member_id = db.Column(db.Integer, db.ForeignKey('members.id'), nullable=False)
+    scenario = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # running, completed, failed, cancelled
+    prompt_hash = db.Column(db.String(64), nullable=False)
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'member_id': self.member_id,
+            'scenario': self.scenario,
+            'status': self.status,
+            'prompt_hash': self.prompt_hash,
+            'message_count': self.message_count,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class GenerationTask(db.Model):
+    __tablename__ = 'generation_tasks'
+    __table_args__ = (
+        db.Index('ix_generation_tasks_status_lease', 'status', 'lease_expires_at'),
+        db.Index('ix_generation_tasks_member_scenario', 'member_id', 'scenario'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    member_id = db.Column(db.Integer, db.ForeignKey('members.id'), nullable=False)
+    scenario = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    lease_owner = db.Column(db.String(100))
+    lease_expires_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'member_id': self.member_id,
+            'scenario': self.scenario,
+            'status': self.status,
+            'attempts': self.attempts,
+            'lease_owner': self.lease_owner,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'message_count': self.message_count,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class OllamaCallStat(db.Model):
+    __tablename__ = 'ollama_call_stats'
+    __table_args__ = (
+        db.Index('ix_ollama_call_stats_model_scenario', 'model', 'scenario'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    member_id = db.Column(db.Integer, db.ForeignKey('members.id'))
+    scenario = db.Column(db.String(50), nullable=False)
+    month = db.Column(db.Integer)
+    model = db.Column(db.String(100), nullable=False)
+    endpoint = db.Column(db.String(200))
+    streamed = db.Column(db.Boolean, nullable=False, default=False)
+    output_format = db.Column(db.String(10), nullable=False, default='text')  # text, json
+    messages_parsed = db.Column(db.Integer, nullable=False, default=0)
+    messages_saved = db.Column(db.Integer, nullable=False, default=0)
+    # Durations are Ollama's nanoseconds
+    total_duration = db.Column(db.BigInteger)
+    load_duration = db.Column(db.BigInteger)
+    prompt_eval_count = db.Column(db.Integer)
+    prompt_eval_duration = db.Column(db.BigInteger)
+    eval_count = db.Column(db.Integer)
+    eval_duration = db.Column(db.BigInteger)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def from_response(cls, result, **fields):
+        """Row for one Ollama response (or final stream chunk)"""
+        return cls(
+            endpoint=result.get('endpoint'),
+            total_duration=result.get('total_duration'),
+            load_duration=result.get('load_duration'),
+            prompt_eval_count=result.get('prompt_eval_count'),
+            prompt_eval_duration=result.get('prompt_eval_duration'),
+            eval_count=result.get('eval_count'),
+            eval_duration=result.get('eval_duration'),
+            **fields
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'member_id': self.member_id,
+            'scenario': self.scenario,
+            'month': self.month,
+            'model': self.model,
+            'endpoint': self.endpoint,
+            'streamed': self.streamed,
+            'output_format': self.output_format,
+            'messages_parsed': self.messages_parsed,
+            'messages_saved': self.messages_saved,
+            'total_duration': self.total_duration,
+            'load_duration': self.load_duration,
+            'prompt_eval_count': self.prompt_eval_count,
+            'prompt_eval_duration': self.prompt_eval_duration,
+            'eval_count': self.eval_count,
+            'eval_duration': self.eval_duration,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,506 @@
+import json
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+from config import Config
+
+
+class OllamaError(Exception):
+    """Raised when Ollama cannot produce a response"""
+
+
+class OllamaUnavailableError(OllamaError):
+    """Raised without calling Ollama while the circuit breaker is open"""
+
+
+class OllamaOverloadedError(OllamaError):
+    """Raised when Ollama timed out or answered 429/5xx, i.e. it is falling behind"""
+
+
+class OllamaDeadlineError(OllamaOverloadedError):
+    """Raised when a model misses the caller's latency budget"""
+
+
+class OllamaRequestError(OllamaError):
+    """Raised when Ollama rejects the request itself, so another server would too"""
+
+
+def is_timeout(error: requests.RequestException) -> bool:
+    """True for connect and read timeouts, including those raised while reading the body.
+
+    requests raises a read timeout in the middle of a response body (every
+    streamed chunk, and non-streamed bodies too) as a ``ConnectionError``
+    wrapping urllib3's ``ReadTimeoutError``, not as ``requests.Timeout``.
+    """
+    if isinstance(error, requests.Timeout):
+        return True
+    return any(isinstance(cause, ReadTimeoutError) for cause in (*error.args, error.__context__))
+
+
+def is_deadline_timeout(error: requests.RequestException, deadline: Optional[float]) -> bool:
+    """True when ``error`` is a timeout caused by reaching the caller's ``deadline``"""
+    return deadline is not None and is_timeout(error) and time.monotonic() >= deadline
+
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, then probe again after a cool-down.
+
+    ``closed`` lets every call through; ``failure_threshold`` consecutive
+    failures open the circuit for ``reset_timeout`` seconds, after which a
+    single ``half_open`` probe decides whether to close it again. A probe
+    that ends without a verdict is handed back with ``release_probe``.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_thread = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = 'half_open'
+                self._probe_thread = threading.get_ident()
+                return True
+            if self.state == 'half_open':
+                # Only one probe at a time while half open
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def release_probe(self):
+        """Reopen the circuit if this thread's probe got neither a success nor a failure.
+
+        ``opened_at`` is kept, so the cool-down has already run out and the
+        next call probes again; a no-op once the probe has been recorded.
+        """
+        with self._lock:
+            if self.state == 'half_open' and self._probe_thread == threading.get_ident():
+                self.state = 'open'
+                self._probe_thread = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class OllamaClient:
+    """HTTP client for one Ollama server.
+
+    Uses a pooled keep-alive ``requests.Session`` with separate connect and
+    read timeouts, retries connection errors, timeouts, 429 and 5xx responses
+    with jittered exponential backoff, and trips a circuit breaker so a dead
+    server fails fast instead of costing a full timeout per scenario.
+    """
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url: str = None, connect_timeout: float = None,
+                 read_timeout: float = None, max_retries: int = None,
+                 backoff: float = None, pool_size: int = None,
+                 keep_alive: str = None):
+        self.base_url = (base_url or Config.OLLAMA_BASE_URL).rstrip('/')
+        self.connect_timeout = connect_timeout or Config.OLLAMA_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or Config.OLLAMA_READ_TIMEOUT
+        self.max_retries = Config.OLLAMA_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = Config.OLLAMA_RETRY_BACKOFF if backoff is None else backoff
+        self.keep_alive = keep_alive or Config.OLLAMA_KEEP_ALIVE
+        self.circuit = CircuitBreaker(Config.OLLAMA_CIRCUIT_FAILURE_THRESHOLD,
+                                      Config.OLLAMA_CIRCUIT_RESET_TIMEOUT)
+
+        pool_size = pool_size or Config.OLLAMA_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def generate(self, model: str, prompt: str, read_timeout: float = None, **fields) -> Dict:
+        """Run a non-streaming ``/api/generate`` call and return Ollama's JSON"""
+        payload = self._payload(model, prompt, stream=False, **fields)
+        response = self._post('/api/generate', payload, stream=False, read_timeout=read_timeout)
+        try:
+            result = response.json()
+        except ValueError as e:
+            raise OllamaError(f"Invalid JSON from Ollama: {e}")
+        if result.get('error'):
+            raise OllamaError(f"Ollama error: {result['error']}")
+        result['endpoint'] = self.base_url
+        return result
+
+    def generate_stream(self, model: str, prompt: str, read_timeout: float = None,
+                        deadline: float = None, **fields) -> Iterator[Dict]:
+        """Yield the NDJSON chunks of a streaming ``/api/generate`` call.
+
+        Only opening the stream is retried; once chunks have been handed to
+        the caller an error propagates rather than replaying the response.
+
+        With a ``deadline`` (a ``time.monotonic()`` value) the read timeout
+        is the time left until it, so a model still loading or evaluating
+        the prompt is abandoned on time too. Running out of time raises
+        ``OllamaDeadlineError`` and, being the caller's budget rather than a
+        server fault, is neither retried nor counted by the circuit breaker.
+        """
+        payload = self._payload(model, prompt, stream=True, **fields)
+        response = self._post('/api/generate', payload, stream=True, read_timeout=read_timeout,
+                              deadline=deadline)
+        with response:
+            try:
+                for raw_line in response.iter_lines():
+                    if not raw_line:
+                        continue
+                    chunk = json.loads(raw_line)
+                    if chunk.get('error'):
+                        raise OllamaError(f"Ollama stream error: {chunk['error']}")
+                    if chunk.get('done'):
+                        chunk['endpoint'] = self.base_url
+                        yield chunk
+                        break
+                    yield chunk
+            except requests.RequestException as e:
+                if is_deadline_timeout(e, deadline):
+                    raise OllamaDeadlineError(f"{model} missed its deadline: {e}")
+                self.circuit.record_failure()
+                error_class = OllamaOverloadedError if is_timeout(e) else OllamaError
+                raise error_class(f"Ollama stream interrupted: {e}")
+
+    def warm_up(self, model: str) -> bool:
+        """Load ``model`` into memory ahead of the first real generation"""
+        payload = {"model": model, "keep_alive": self.keep_alive, "stream": False}
+        try:
+            self._post('/api/generate', payload, stream=False, retries=0)
+            print(f"🔥 Ollama model {model} loaded at {self.base_url}")
+            return True
+        except OllamaError as e:
+            print(f"⚠️  Could not warm up Ollama model {model}: {e}")
+            return False
+
+    def check_health(self) -> bool:
+        """True when the server answers ``/api/tags``"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags",
+                                        timeout=(self.connect_timeout, self.connect_timeout))
+            response.close()
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _payload(self, model: str, prompt: str, stream: bool, **fields) -> Dict:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive
+        }
+        payload.update({key: value for key, value in fields.items() if value is not None})
+        return payload
+
+    def _post(self, path: str, payload: Dict, stream: bool, read_timeout: float = None,
+              retries: int = None, deadline: float = None) -> requests.Response:
+        retries = self.max_retries if retries is None else retries
+        url = f"{self.base_url}{path}"
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        last_error = None
+        overloaded = False
+
+        for attempt in range(retries + 1):
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise OllamaDeadlineError(f"Deadline passed before calling Ollama: {last_error}")
+                timeout = (self.connect_timeout, remaining)
+            if not self.circuit.allow():
+                raise OllamaUnavailableError(f"Ollama at {self.base_url} is unavailable (circuit open)")
+
+            try:
+                response = self.session.post(url, json=payload, stream=stream, timeout=timeout)
+            except requests.RequestException as e:
+                if is_deadline_timeout(e, deadline):
+                    raise OllamaDeadlineError(f"{payload.get('model')} missed its deadline: {e}")
+                last_error = e
+                overloaded = is_timeout(e)
+                self.circuit.record_failure()
+            else:
+                if response.status_code == 200:
+                    self.circuit.record_success()
+                    return response
+
+                body = response.text[:200]
+                response.close()
+                last_error = f"HTTP {response.status_code}: {body}"
+                if response.status_code not in self.RETRYABLE_STATUS:
+                    # A bad request will not get better by retrying
+                    self.circuit.record_success()
+                    raise OllamaRequestError(f"Ollama API error: {last_error}")
+                overloaded = True
+                self.circuit.record_failure()
+            finally:
+                # A missed deadline says nothing about the server, but must not leave it half open
+                self.circuit.release_probe()
+
+            if attempt < retries:
+                # Full jitter: sleep somewhere between 0 and the exponential cap
+                time.sleep(random.uniform(0, min(self.backoff * (2 ** attempt), 30.0)))
+
+        error_class = OllamaOverloadedError if overloaded else OllamaError
+        raise error_class(f"Ollama request failed after {retries + 1} attempts: {last_error}")
+
+
+class OllamaEndpoint:
+    """Routing state for one server in an ``OllamaEndpointPool``"""
+
+    def __init__(self, client: OllamaClient, eject_seconds: float):
+        self.client = client
+        self.eject_seconds = eject_seconds
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.tokens_per_second = None
+        self.ejected_until = 0.0
+        self.last_error = None
+
+    @property
+    def base_url(self) -> str:
+        return self.client.base_url
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def load(self, default_rate: float) -> float:
+        """Expected wait: queued requests over recent generation speed"""
+        return (self.in_flight + 1) / (self.tokens_per_second or default_rate)
+
+    def record_success(self, result: Dict, smoothing: float):
+        eval_count = result.get('eval_count')
+        eval_duration = result.get('eval_duration')
+        if eval_count and eval_duration:
+            rate = eval_count / (eval_duration / 1e9)
+            if self.tokens_per_second is None:
+                self.tokens_per_second = rate
+            else:
+                self.tokens_per_second += smoothing * (rate - self.tokens_per_second)
+
+    def eject(self, error, now: float):
+        self.failures += 1
+        self.last_error = str(error)
+        self.ejected_until = now + self.eject_seconds
+
+    def to_dict(self, now: float) -> Dict:
+        return {
+            'base_url': self.base_url,
+            'healthy': self.is_healthy(now),
+            'ejected_for_seconds': round(max(0.0, self.ejected_until - now), 1),
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'failures': self.failures,
+            'tokens_per_second': round(self.tokens_per_second, 1) if self.tokens_per_second else None,
+            'circuit': self.client.circuit.state,
+            'last_error': self.last_error
+        }
+
+
+class OllamaEndpointPool:
+    """Spread calls over several Ollama servers.
+
+    Each call goes to the healthy endpoint with the lowest expected wait,
+    i.e. in-flight requests divided by its recent (EWMA) tokens per second.
+    An endpoint that errors, or whose stream stalls for ``stall_timeout``
+    seconds, is ejected for ``eject_seconds`` and the call fails over to the
+    next one. Offers the same ``generate``/``generate_stream`` interface as
+    ``OllamaClient``.
+    """
+
+    def __init__(self, base_urls: List[str], eject_seconds: float = None,
+                 stall_timeout: float = None, smoothing: float = 0.3, max_attempts: int = None):
+        if not base_urls:
+            raise ValueError("OllamaEndpointPool needs at least one base URL")
+        eject_seconds = eject_seconds or Config.OLLAMA_EJECT_SECONDS
+        # Fail over to another server rather than retrying the same one
+        self.endpoints = [OllamaEndpoint(OllamaClient(url, max_retries=0), eject_seconds)
+                          for url in base_urls]
+        self.base_url = ','.join(endpoint.base_url for endpoint in self.endpoints)
+        self.stall_timeout = stall_timeout or Config.OLLAMA_STALL_TIMEOUT
+        self.smoothing = smoothing
+        self.max_attempts = max_attempts or max(len(self.endpoints), Config.OLLAMA_MAX_RETRIES + 1)
+        self._lock = threading.Lock()
+
+    def generate(self, model: str, prompt: str, read_timeout: float = None, **fields) -> Dict:
+        last_error = None
+        for _ in range(self.max_attempts):
+            endpoint = self._acquire()
+            try:
+                result = endpoint.client.generate(model, prompt, read_timeout=read_timeout, **fields)
+            except OllamaRequestError:
+                self._release(endpoint)
+                raise
+            except OllamaError as e:
+                last_error = e
+                self._release(endpoint, error=e)
+                continue
+            self._release(endpoint, result=result)
+            return result
+        error_class = OllamaOverloadedError if isinstance(last_error, OllamaOverloadedError) else OllamaError
+        raise error_class(f"All Ollama endpoints failed: {last_error}")
+
+    def generate_stream(self, model: str, prompt: str, read_timeout: float = None,
+                        deadline: float = None, **fields) -> Iterator[Dict]:
+        """Stream from the least-loaded endpoint.
+
+        Failing over is only possible until the first chunk is yielded, and
+        a missed ``deadline`` is not failed over at all.
+        """
+        last_error = None
+        for _ in range(self.max_attempts):
+            endpoint = self._acquire()
+            started = False
+            final_chunk = None
+            try:
+                for chunk in endpoint.client.generate_stream(model, prompt,
+                                                             read_timeout=read_timeout or self.stall_timeout,
+                                                             deadline=deadline, **fields):
+                    started = True
+                    if chunk.get('done'):
+                        final_chunk = chunk
+                    yield chunk
+            except (OllamaRequestError, OllamaDeadlineError):
+                self._release(endpoint)
+                raise
+            except OllamaError as e:
+                self._release(endpoint, error=e)
+                if started:
+                    raise
+                last_error = e
+                continue
+            except BaseException:
+                # Caller stopped reading; the endpoint did nothing wrong
+                self._release(endpoint)
+                raise
+            self._release(endpoint, result=final_chunk or {})
+            return
+        error_class = OllamaOverloadedError if isinstance(last_error, OllamaOverloadedError) else OllamaError
+        raise error_class(f"All Ollama endpoints failed: {last_error}")
+
+    def warm_up(self, model: str) -> bool:
+        results = [endpoint.client.warm_up(model) for endpoint in self.endpoints]
+        return any(results)
+
+    def check_health(self) -> bool:
+        """Ping every endpoint, ejecting dead ones and reinstating recovered ones"""
+        for endpoint in self.endpoints:
+            healthy = endpoint.client.check_health()
+            with self._lock:
+                now = time.monotonic()
+                if healthy:
+                    endpoint.ejected_until = 0.0
+                elif endpoint.is_healthy(now):
+                    endpoint.eject('health check failed', now)
+        return any(endpoint.is_healthy(time.monotonic()) for endpoint in self.endpoints)
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            now = time.monotonic()
+            return [endpoint.to_dict(now) for endpoint in self.endpoints]
+
+    def _acquire(self) -> OllamaEndpoint:
+        with self._lock:
+            now = time.monotonic()
+            healthy = [endpoint for endpoint in self.endpoints if endpoint.is_healthy(now)]
+            if not healthy:
+                raise OllamaUnavailableError(f"No healthy Ollama endpoint among {self.base_url}")
+            # Unmeasured endpoints are assumed as fast as the best one, so they get tried
+            default_rate = max((endpoint.tokens_per_second or 0.0 for endpoint in healthy), default=0.0) or 1.0
+            endpoint = min(healthy, key=lambda endpoint: (endpoint.load(default_rate), endpoint.requests))
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint: OllamaEndpoint, result: Dict = None, error: Exception = None):
+        with self._lock:
+            endpoint.in_flight -= 1
+            if error is not None:
+                endpoint.eject(error, time.monotonic())
+            elif result is not None:
+                endpoint.record_success(result, self.smoothing)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+_pool = None
+
+
+def get_ollama_client(base_url: str = None):
+    """Shared client per base URL so connections and circuit state are reused.
+
+    Without an explicit ``base_url`` and with several ``OLLAMA_BASE_URLS``
+    configured, returns the shared ``OllamaEndpointPool`` instead.
+    """
+    global _pool
+    with _clients_lock:
+        if base_url is None and len(Config.OLLAMA_BASE_URLS) > 1:
+            if _pool is None:
+                _pool = OllamaEndpointPool(Config.OLLAMA_BASE_URLS)
+            return _pool
+
+        base_url = (base_url or Config.OLLAMA_BASE_URL).rstrip('/')
+        client = _clients.get(base_url)
+        if client is None:
+            client = OllamaClient(base_url)
+            _clients[base_url] = client
+        return client
+
+
+def get_endpoint_stats() -> List[Dict]:
+    client = get_ollama_client()
+    if isinstance(client, OllamaEndpointPool):
+        return client.stats()
+    return [{
+        'base_url': client.base_url,
+        'healthy': client.circuit.state != 'open',
+        'circuit': client.circuit.state
+    }]
+
+
+def start_health_checks(interval: float = None) -> Optional[threading.Thread]:
+    """Periodically re-check pooled endpoints so ejected servers come back promptly"""
+    client = get_ollama_client()
+    if not isinstance(client, OllamaEndpointPool):
+        return None
+    interval = interval or Config.OLLAMA_HEALTH_CHECK_INTERVAL
+
+    def run():
+        while True:
+            client.check_health()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='elyx-ollama-health', daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_up_in_background(base_url: str = None, model: str = None) -> Optional[threading.Thread]:
+    """Warm the default model without delaying application startup"""
+    if not Config.OLLAMA_WARMUP:
+        return None
+    client = get_ollama_client(base_url)
+    thread = threading.Thread(target=client.warm_up, args=(model or Config.OLLAMA_MODEL,),
+                              name='elyx-ollama-warmup', daemon=True)
+    thread.start()
+    return thread
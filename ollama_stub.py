@@ -0,0 +1,243 @@
+"""Deterministic stand-in for an Ollama server.
+
+Serves ``/api/generate`` and ``/api/chat`` (streaming and non-streaming),
+``/api/tags`` and ``/api/version``. Responses are WhatsApp-format
+transcripts generated from templates (a JSON messages document when the
+request has a ``format``), seeded by the prompt so the same
+request always gets the same text, and paced to a configurable first-token
+latency and tokens per second.
+
+Usage:
+    python ollama_stub.py [--port 11435] [--latency 0.5] [--tokens-per-second 40] [--messages 15]
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+STUB_SENDERS = [
+    'Rohan Patel', 'Ruby (Concierge)', 'Dr. Warren (Medical)', 'Advik (Performance)',
+    'Carla (Nutrition)', 'Rachel (PT)', 'Neel (Lead)', 'Dr. Evans'
+]
+
+STUB_TEMPLATES = [
+    "My HRV was {hrv}ms this morning and recovery is at {recovery}%.",
+    "Let's keep the Zone 2 cardio at {minutes} minutes for the next {days} days.",
+    "I've updated your supplement list; magnesium threonate {mg}mg before bed.",
+    "Flight to {city} moved to {weekday}, I'll send the travel protocol tonight.",
+    "Can we schedule the appointment with the cardiologist for {weekday}?",
+    "Resting heart rate is up {bpm}bpm since yesterday, this looks urgent.",
+    "Sleep latency dropped to {minutes} minutes with the new wind-down routine.",
+    "Thanks, that makes sense. I'll try it and report back on {weekday}.",
+    "Your CGM peaked at {glucose} mg/dL after lunch, let's adjust the carbs.",
+    "Great progress overall, we'll review the numbers together on {weekday}.",
+]
+
+STUB_CITIES = ['Jakarta', 'London', 'Seoul', 'New York']
+STUB_WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+
+def build_transcript(prompt: str, messages: int = 15) -> str:
+    """Template-generated transcript, identical for identical prompts"""
+    rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+    month_match = re.search(r'Month (\d+)', prompt)
+    month = int(month_match.group(1)) if month_match else rng.randint(1, 8)
+    timestamp = datetime(2025, min(month, 12), 1, 8, 0) + timedelta(days=rng.randint(0, 20))
+
+    lines = ["Here are the conversations:", ""]
+    for _ in range(messages):
+        timestamp += timedelta(minutes=rng.randint(5, 600))
+        text = rng.choice(STUB_TEMPLATES).format(
+            hrv=rng.randint(25, 80), recovery=rng.randint(20, 95), minutes=rng.randint(8, 45),
+            days=rng.randint(3, 14), mg=rng.choice([144, 288]), city=rng.choice(STUB_CITIES),
+            weekday=rng.choice(STUB_WEEKDAYS), bpm=rng.randint(5, 15), glucose=rng.randint(110, 190)
+        )
+        lines.append(f"[{timestamp.strftime('%d/%m/%y, %I:%M %p').lstrip('0')}] {rng.choice(STUB_SENDERS)}: {text}")
+    return '\n'.join(lines)
+
+
+def build_json_transcript(prompt: str, messages: int = 15) -> str:
+    """The same messages as ``build_transcript``, as a ``{"messages": [...]}`` document"""
+    items = []
+    for line in build_transcript(prompt, messages).splitlines():
+        match = re.match(r'\[(.+?)\] ([^:]+): (.*)', line)
+        if match:
+            timestamp = datetime.strptime(match.group(1), '%d/%m/%y, %I:%M %p')
+            items.append({'timestamp': timestamp.strftime('%Y-%m-%d %H:%M'),
+                          'sender': match.group(2), 'message': match.group(3)})
+    return json.dumps({'messages': items})
+
+
+def split_tokens(text: str) -> List[str]:
+    """Rough word-and-whitespace tokens, so token counts look like Ollama's"""
+    return re.findall(r'\s*\S+|\s+', text)
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json({'models': [{'name': self.server.model}]})
+        elif self.path == '/api/version':
+            self._send_json({'version': 'stub'})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json({'error': 'invalid JSON'}, status=400)
+            return
+
+        if self.path == '/api/generate':
+            prompt = (request.get('system') or '') + (request.get('prompt') or '')
+            chat = False
+        elif self.path == '/api/chat':
+            prompt = ''.join(message.get('content', '') for message in request.get('messages', []))
+            chat = True
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+            return
+
+        self.server.request_count += 1
+        if not prompt:
+            # Ollama answers an empty prompt by just loading the model
+            self._send_json(self._final(request, chat, '', 0, 0))
+            return
+
+        if request.get('format'):
+            tokens = split_tokens(build_json_transcript(prompt, self.server.messages))
+        else:
+            tokens = split_tokens(build_transcript(prompt, self.server.messages))
+        num_predict = (request.get('options') or {}).get('num_predict')
+        if num_predict is not None and num_predict >= 0:
+            tokens = tokens[:num_predict]
+        prompt_tokens = len(split_tokens(prompt))
+
+        time.sleep(self.server.latency)
+        if request.get('stream', True):
+            self._stream(request, chat, tokens, prompt_tokens)
+        else:
+            self._pace(len(tokens))
+            self._send_json(self._final(request, chat, ''.join(tokens), len(tokens), prompt_tokens))
+
+    def _stream(self, request: Dict, chat: bool, tokens: List[str], prompt_tokens: int):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for token in tokens:
+                self._pace(1)
+                self._write_chunk(self._chunk(request, chat, token))
+            self._write_chunk(self._final(request, chat, '', len(tokens), prompt_tokens))
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, as the generator does on cancel
+            pass
+
+    def _pace(self, tokens: int):
+        if self.server.tokens_per_second:
+            time.sleep(tokens / self.server.tokens_per_second)
+
+    def _chunk(self, request: Dict, chat: bool, text: str) -> Dict:
+        chunk = {'model': request.get('model', self.server.model),
+                 'created_at': datetime.utcnow().isoformat() + 'Z', 'done': False}
+        if chat:
+            chunk['message'] = {'role': 'assistant', 'content': text}
+        else:
+            chunk['response'] = text
+        return chunk
+
+    def _final(self, request: Dict, chat: bool, text: str, eval_count: int, prompt_tokens: int) -> Dict:
+        final = self._chunk(request, chat, text)
+        eval_seconds = eval_count / self.server.tokens_per_second if self.server.tokens_per_second else 0.0
+        final.update({
+            'done': True,
+            'done_reason': 'stop',
+            'total_duration': int((self.server.latency + eval_seconds) * 1e9),
+            'load_duration': 0,
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int(self.server.latency * 1e9),
+            'eval_count': eval_count,
+            'eval_duration': int(eval_seconds * 1e9)
+        })
+        return final
+
+    def _write_chunk(self, obj: Dict):
+        data = (json.dumps(obj) + '\n').encode('utf-8')
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, obj: Dict, status: int = 200):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OllamaStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 11435, latency: float = 0.0,
+                 tokens_per_second: float = 0.0, messages: int = 15, model: str = 'llama3.1:8b'):
+        super().__init__((host, port), OllamaStubHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.messages = messages
+        self.model = model
+        self.request_count = 0
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is not worth a traceback
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(port: int = 0, **options) -> OllamaStubServer:
+    """Serve from a daemon thread; port 0 picks a free port (see ``base_url``)"""
+    server = OllamaStubServer(port=port, **options)
+    threading.Thread(target=server.serve_forever, name='elyx-ollama-stub', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help='0 streams as fast as possible')
+    parser.add_argument('--messages', type=int, default=15, help='messages per transcript')
+    args = parser.parse_args()
+
+    server = OllamaStubServer(args.host, args.port, args.latency, args.tokens_per_second, args.messages)
+    print(f"🧪 Ollama stub listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import re
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+
+from models import db
+
+# Endpoints whose queries must stay index-backed; {member_id} is filled in
+QUERY_PLAN_ENDPOINTS = [
+    '/api/member/{member_id}',
+    '/api/conversations',
+    '/api/conversations?limit=50&after=2025-03-01T00:00:00_1',
+    '/api/conversations?limit=50&before=2025-03-01T00:00:00_1',
+    '/api/conversations/{member_id}',
+    '/api/conversations/{member_id}?limit=50&after=2025-03-01T00:00:00_1',
+    '/api/timeline',
+    '/api/timeline/{member_id}',
+    '/api/filter-timeline?category=breakthrough',
+    '/api/filter-timeline?member_id={member_id}',
+    '/api/filter-timeline?category=breakthrough&member_id={member_id}',
+    '/api/health-metrics',
+    '/api/health-metrics/{member_id}',
+    '/api/decisions',
+    '/api/decisions/{member_id}',
+    '/api/team-metrics',
+    '/api/stats',
+    '/api/stats/{member_id}',
+]
+
+
+class QueryCheckError(Exception):
+    """Raised when an endpoint under check doesn't answer 200"""
+
+
+@contextlib.contextmanager
+def capture_statements(executemany: bool = True):
+    """Collect ``(statement, parameters)`` for every statement run on ``db.engine``"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, is_executemany):
+        if executemany or not is_executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def count_page_queries(client, member_id: int, limit: int = 500) -> Tuple[int, List[str]]:
+    """Messages returned by a member's conversation page and the statements it took"""
+    url = f'/api/conversations/{member_id}?limit={limit}'
+    with capture_statements() as statements:
+        response = client.get(url)
+    if response.status_code != 200:
+        raise QueryCheckError(f"{url} answered {response.status_code}")
+    return len(response.get_json()['conversations']), [statement for statement, _ in statements]
+
+
+def check_query_plans(client, member_id: int) -> List[Dict]:
+    """``EXPLAIN QUERY PLAN`` every SELECT issued by the endpoints and ``init_database``.
+
+    Returns one ``{'source', 'statement', 'plan', 'problems'}`` per distinct
+    statement; ``problems`` lists plan steps that sort in a temp B-tree, or
+    that scan a table or an index in a query with a WHERE clause (a full
+    scan is only expected when a query reads the whole table by design).
+    """
+    from database import init_database
+
+    if db.engine.dialect.name != 'sqlite':
+        raise QueryCheckError('EXPLAIN QUERY PLAN checks need SQLite')
+
+    captured = []
+    for endpoint in QUERY_PLAN_ENDPOINTS:
+        source = endpoint.format(member_id=member_id)
+        with capture_statements(executemany=False) as statements:
+            response = client.get(source)
+        if response.status_code != 200:
+            raise QueryCheckError(f"{source} answered {response.status_code}")
+        captured.extend((source, statement, parameters) for statement, parameters in statements)
+    with capture_statements(executemany=False) as statements, contextlib.redirect_stdout(io.StringIO()):
+        init_database()
+    captured.extend(('init_database', statement, parameters) for statement, parameters in statements)
+
+    results = []
+    seen = set()
+    for source, statement, parameters in captured:
+        if (not statement.lstrip().upper().startswith('SELECT') or 'sqlite_master' in statement
+                or statement in seen):
+            continue
+        seen.add(statement)
+        plan = [row[-1] for row in db.session.connection().exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', parameters)]
+        has_where = re.search(r'\bWHERE\b', statement, re.IGNORECASE)
+        problems = [step for step in plan if 'TEMP B-TREE' in step
+                    or (has_where and re.match(r'SCAN \w+', step))]
+        results.append({'source': source, 'statement': statement, 'plan': plan, 'problems': problems})
+    return results
@@ -1,7 +1,14 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, current_app, url_for
 from models import db, Member, TeamMember, Conversation, TimelineEvent, HealthMetric, Decision, TeamMetric
+from generation_jobs import generation_jobs
 from conversation_generator import ElyxConversationGenerator
-from sqlalchemy import func, desc
+from ollama_client import get_endpoint_stats
+from generation_metrics import get_generation_metrics
+import conversation_search
+from member_stats import get_member_stats
+from config import Config
+from sqlalchemy import func, desc, tuple_
+from datetime import datetime
 import json
 
 # Create blueprint
@@ -35,18 +42,107 @@ def get_member(member_id):
 def get_default_member():
     return get_member(1)
 
+def encode_cursor(conv):
+    """Opaque-enough page cursor for a conversation's (timestamp, id) position"""
+    return f"{conv.timestamp.isoformat()}_{conv.id}"
+
+def decode_cursor(cursor):
+    timestamp, _, conv_id = cursor.rpartition('_')
+    return datetime.fromisoformat(timestamp), int(conv_id)
+
+def paginate_conversations(query):
+    """One page of ``query`` in (timestamp, id) order from the request's cursors.
+
+    ``limit`` (default ``CONVERSATIONS_PAGE_SIZE``, capped at
+    ``CONVERSATIONS_MAX_PAGE_SIZE``) rows are read starting right after
+    the ``after`` cursor or ending right before the ``before`` cursor, so
+    every page is an index range scan however large the table is.
+    Returns ``(conversations, page)`` where ``page`` holds the cursors of
+    the neighbouring pages (None when there are none), or raises
+    ``ValueError`` for bad arguments.
+    """
+    limit = request.args.get('limit', Config.CONVERSATIONS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, Config.CONVERSATIONS_MAX_PAGE_SIZE))
+    after = request.args.get('after')
+    before = request.args.get('before')
+    if after and before:
+        raise ValueError('Pass either after or before, not both')
+    try:
+        after_key = decode_cursor(after) if after else None
+        before_key = decode_cursor(before) if before else None
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+    key = tuple_(Conversation.timestamp, Conversation.id)
+    if before_key:
+        # Walk backwards from the cursor, then restore chronological order
+        rows = query.filter(key < before_key) \
+            .order_by(Conversation.timestamp.desc(), Conversation.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        prev_cursor = encode_cursor(rows[0]) if has_more else None
+        next_cursor = encode_cursor(rows[-1]) if rows else before
+    else:
+        if after_key:
+            query = query.filter(key > after_key)
+        rows = query.order_by(Conversation.timestamp, Conversation.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]) if has_more else None
+        prev_cursor = (encode_cursor(rows[0]) if rows else after) if after else None
+
+    return rows, {'limit': limit, 'next_cursor': next_cursor, 'prev_cursor': prev_cursor}
+
 @main.route('/api/conversations')
 def get_conversations():
-    """Get all conversations"""
-    conversations = Conversation.query.order_by(Conversation.timestamp).all()
-    return jsonify([conv.to_dict() for conv in conversations])
+    """Get a page of conversations, oldest first"""
+    try:
+        conversations, page = paginate_conversations(Conversation.query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(dict(page, conversations=[conv.to_dict() for conv in conversations]))
+
+def display_timestamp(column):
+    """``column`` as WhatsApp's ``DD/MM/YY, HH:MM AM`` computed by the database.
+
+    Returns None on dialects without a suitable expression, where callers
+    fall back to ``strftime`` in Python.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return func.to_char(column, 'DD/MM/YY, HH12:MI AM')
+    if dialect == 'sqlite':
+        # SQLite's strftime has no %y, %I or %p
+        def as_text(fn, *args):
+            return fn(*args, type_=db.String)
+        hour = func.cast(func.strftime('%H', column), db.Integer)
+        return (as_text(func.strftime, '%d/%m/', column) + as_text(func.substr, as_text(func.strftime, '%Y', column), 3, 2)
+                + ', ' + as_text(func.printf, '%02d', (hour + 11) % 12 + 1) + ':' + as_text(func.strftime, '%M', column)
+                + db.case((hour < 12, ' AM'), else_=' PM'))
+    return None
 
 @main.route('/api/conversations/<int:member_id>')
 def get_member_conversations(member_id):
-    """Get conversations for a specific member with proper name display"""
+    """Get a page of conversations for a specific member with proper name display.
+
+    Sender names and roles come from the same joined query as the
+    messages, and the display timestamp is formatted by the database.
+    """
     member = Member.query.get(member_id)
-    conversations = Conversation.query.filter_by(member_id=member_id).order_by(Conversation.timestamp).all()
+    formatted = display_timestamp(Conversation.timestamp)
+    query = db.session.query(
+        Conversation.id, Conversation.sender, Conversation.message, Conversation.category,
+        Conversation.timestamp, Conversation.team_member_id,
+        TeamMember.name.label('team_member_name'), TeamMember.role.label('team_member_role'),
+        (formatted if formatted is not None else db.null()).label('display_timestamp')
+    ).outerjoin(TeamMember, Conversation.team_member_id == TeamMember.id) \
+        .filter(Conversation.member_id == member_id)
+    try:
+        conversations, page = paginate_conversations(query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
+    member_name = member.preferred_name if member else 'Rohan Patel'
     result = []
     for conv in conversations:
         # ✅ Ensure proper sender names for display
@@ -55,26 +151,22 @@ def get_member_conversations(member_id):
         
         if conv.team_member_id:
             # It's from a team member
-            sender_name = conv.team_member.name if conv.team_member else conv.sender
-            sender_role = conv.team_member.role if conv.team_member else 'Team Member'
+            sender_name = conv.team_member_name or conv.sender
+            sender_role = conv.team_member_role or 'Team Member'
         elif conv.sender in ['member', 'Member']:
             # Convert generic member to actual name
-            sender_name = member.preferred_name if member else 'Rohan Patel'
-            sender_role = 'Member'
-        elif conv.sender == member.preferred_name if member else conv.sender == 'Rohan Patel':
-            # It's the member
-            sender_role = 'Member'
+            sender_name = member_name
         
         result.append({
             'id': conv.id,
             'sender': sender_name,
             'sender_role': sender_role,
             'message': conv.message,
-            'timestamp': conv.timestamp.strftime('%d/%m/%y, %I:%M %p'),  # ✅ Proper date format
+            'timestamp': conv.display_timestamp or conv.timestamp.strftime('%d/%m/%y, %I:%M %p'),  # ✅ Proper date format
             'category': conv.category
         })
     
-    return jsonify(result)
+    return jsonify(dict(page, conversations=result))
 
 @main.route('/api/timeline')
 def get_timeline():
@@ -108,7 +200,8 @@ def get_health_metrics():
 @main.route('/api/health-metrics/<int:member_id>')
 def get_member_health_metrics(member_id):
     """Get health metrics for a specific member"""
-    metrics = HealthMetric.query.filter_by(member_id=member_id).order_by(HealthMetric.date).all()
+    metrics = HealthMetric.query.filter_by(member_id=member_id) \
+        .order_by(HealthMetric.metric_type, HealthMetric.date).all()
 
     # Group by metric type
     grouped_metrics = {}
@@ -155,52 +248,49 @@ def get_team_metrics():
     return jsonify(metrics)
 
 @main.route('/api/stats')
-def get_stats():
-    """Get dashboard statistics"""
-    member = Member.query.first()
-    if not member:
+@main.route('/api/stats/<int:member_id>')
+def get_stats(member_id=None):
+    """Get dashboard statistics, a single read of the member's member_stats row"""
+    stats = get_member_stats(member_id)
+    if stats is None:
         return jsonify({'error': 'No member found'}), 404
-
-    # Calculate stats
-    total_conversations = Conversation.query.filter_by(member_id=member.id).count()
-    total_events = TimelineEvent.query.filter_by(member_id=member.id).count()
-    breakthroughs = TimelineEvent.query.filter_by(
-        member_id=member.id, 
-        status='breakthrough'
-    ).count()
-
-    # Get unique team members involved
-    team_members_count = db.session.query(
-        func.count(func.distinct(Conversation.team_member_id))
-    ).filter(
-        Conversation.member_id == member.id,
-        Conversation.team_member_id.isnot(None)
-    ).scalar()
-
-    return jsonify({
-        'total_conversations': total_conversations,
-        'total_events': total_events,
-        'breakthroughs': breakthroughs,
-        'team_members': team_members_count,
-        'days_in_program': 240  # Calculated from start date
-    })
+    return jsonify(stats.to_dict())
 
 @main.route('/api/generate-conversations', methods=['POST'])
 def generate_conversations():
-    """Generate new conversations using Ollama"""
+    """Queue a conversation generation job using Ollama"""
     try:
         member = Member.query.first()
         if not member:
             return jsonify({'error': 'No member found'}), 404
 
-        generator = ElyxConversationGenerator()
-        total_generated = generator.generate_full_dataset(member.id)
+        options = request.get_json(silent=True) or {}
+        use_cache = False if options.get('bypass_cache') else None
+        replace_months = options.get('replace_months')
+        if replace_months is not None:
+            try:
+                replace_months = sorted({int(month) for month in replace_months})
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'replace_months must be a list of month numbers'}), 400
+            known_months = {scenario['month'] for scenario in ElyxConversationGenerator(use_cache=False).get_scenarios()}
+            unknown_months = [month for month in replace_months if month not in known_months]
+            if not replace_months or unknown_months:
+                return jsonify({
+                    'success': False,
+                    'error': f"replace_months must list months with a scenario ({min(known_months)}-{max(known_months)}); "
+                             f"got {unknown_months or replace_months}"
+                }), 400
+
+        job = generation_jobs.submit(current_app._get_current_object(), member.id,
+                                     use_cache=use_cache, replace_months=replace_months,
+                                     resume=bool(options.get('resume')))
 
         return jsonify({
             'success': True,
-            'message': f'Generated {total_generated} conversations',
-            'total_conversations': total_generated
-        })
+            'message': 'Conversation generation started',
+            'job_id': job.id,
+            'status_url': url_for('main.get_generation_job', job_id=job.id)
+        }), 202
 
     except Exception as e:
         return jsonify({
@@ -208,24 +298,43 @@ def generate_conversations():
             'error': str(e)
         }), 500
 
+@main.route('/api/generation-jobs/<job_id>')
+def get_generation_job(job_id):
+    """Get progress of a conversation generation job"""
+    job = generation_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify(job.to_dict())
+
+@main.route('/api/generation-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_generation_job(job_id):
+    """Cancel a queued or running conversation generation job"""
+    job = generation_jobs.cancel(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify(job.to_dict())
+
+@main.route('/api/ollama-endpoints')
+def get_ollama_endpoints():
+    """Get health, load and throughput of each configured Ollama endpoint"""
+    return jsonify(get_endpoint_stats())
+
+@main.route('/api/generation-metrics')
+def generation_metrics():
+    """Get Ollama throughput, cold loads and message yield by model and scenario"""
+    return jsonify(get_generation_metrics())
+
 @main.route('/api/search-conversations')
 def search_conversations():
-    """Search conversations by query"""
+    """Search conversations, best match first, with highlighted snippets"""
     query = request.args.get('q', '')
     member_id = request.args.get('member_id', type=int)
+    limit = request.args.get('limit', Config.CONVERSATIONS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, Config.CONVERSATIONS_MAX_PAGE_SIZE))
 
-    conversations_query = Conversation.query
-
-    if member_id:
-        conversations_query = conversations_query.filter_by(member_id=member_id)
-
-    if query:
-        conversations_query = conversations_query.filter(
-            Conversation.message.contains(query)
-        )
-
-    conversations = conversations_query.order_by(Conversation.timestamp).all()
-    return jsonify([conv.to_dict() for conv in conversations])
+    return jsonify(conversation_search.search_conversations(query, member_id, limit))
 
 @main.route('/api/filter-timeline')
 def filter_timeline():
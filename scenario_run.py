@@ -0,0 +1,149 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from ollama_client import OllamaOverloadedError
+
+
+class ScenarioRun:
+    """The Ollama calls that generate one scenario of a dataset run.
+
+    ``run`` makes the scenario's request on its routed model, moves to the
+    route's fallback model when the primary misses its latency budget or is
+    overloaded, then sends top-up requests while fewer than
+    ``min_messages`` were parsed. Parsed messages collect in
+    ``conversations`` and every call (model, Ollama's final response,
+    messages parsed, error and timing) in ``calls``, so the thread that
+    saves the messages can feed the concurrency limiter and store call
+    stats once the scenario is done.
+    """
+
+    def __init__(self, generator, scenario: Dict, stream: bool,
+                 cancel_event: threading.Event = None):
+        self.generator = generator
+        self.scenario = scenario
+        self.stream = stream
+        self.cancel_event = cancel_event
+        self.model = scenario['route']['model']
+        self.conversations = []
+        self.calls = []
+        self._report_batch = None
+
+    def run(self, report_batch: Callable[[List[Dict]], None] = None) -> Optional[List[Dict]]:
+        """Generate the scenario; None when Ollama answered with nothing at all.
+
+        In streaming mode parsed batches are also handed to ``report_batch``
+        as they arrive.
+        """
+        scenario = self.scenario
+        route = scenario['route']
+        self._report_batch = report_batch
+        print(f"📅 Generating {scenario['label']}...")
+
+        try:
+            _, empty = self.generate(scenario['prompt'], scenario['max_messages'],
+                                     latency_budget=route['latency_budget'])
+        except OllamaOverloadedError as e:
+            if not route['fallback']:
+                raise
+            # Messages already streamed are kept; top-ups below ask the fallback for the rest
+            print(f"   ⏱️ {scenario['label']}: {self.model} too slow ({e}), falling back to {route['fallback']}")
+            self.model = route['fallback']
+            empty = False
+            if not self.conversations:
+                _, empty = self.generate(scenario['prompt'], scenario['max_messages'])
+        if empty and not self.conversations:
+            return None
+
+        self.top_up()
+        return self.conversations
+
+    def generate(self, prompt: str, max_messages: int, num_predict: int = None,
+                 latency_budget: float = None) -> Tuple[int, bool]:
+        """One call on the current model: the messages it parsed and whether the response was empty"""
+        generator = self.generator
+        started = time.monotonic()
+        parsed_before = len(self.conversations)
+        empty = False
+        error = None
+        try:
+            if self.stream:
+                generator.stream_conversations(prompt, self.scenario['month'], self._keep_batch,
+                                               cancel_event=self.cancel_event, max_messages=max_messages,
+                                               num_predict=num_predict, model=self.model,
+                                               latency_budget=latency_budget)
+            else:
+                response = generator.call_ollama(prompt, num_predict, self.model, latency_budget)
+                self._keep(generator.parse_ollama_response(response, self.scenario['month'])[:max_messages])
+                empty = not response.strip()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.calls.append({'model': self.model, 'result': generator.pop_last_response(),
+                               'parsed': len(self.conversations) - parsed_before, 'error': error,
+                               'started': started, 'elapsed': time.monotonic() - started})
+        return len(self.conversations) - parsed_before, empty
+
+    def top_up(self):
+        """Ask for the missing messages, up to ``GENERATION_MAX_TOP_UPS`` times"""
+        scenario = self.scenario
+        top_ups = 0
+        while (len(self.conversations) < scenario['min_messages'] and top_ups < Config.GENERATION_MAX_TOP_UPS
+               and not (self.cancel_event is not None and self.cancel_event.is_set())):
+            missing = scenario['min_messages'] - len(self.conversations)
+            print(f"   ➕ {scenario['label']}: {len(self.conversations)} messages, asking for {missing} more")
+            top_ups += 1
+            parsed_count, _ = self.generate(
+                self.generator.build_top_up_prompt(scenario, self.conversations, missing),
+                scenario['max_messages'] - len(self.conversations),
+                missing * Config.GENERATION_TOKENS_PER_MESSAGE)
+            if not parsed_count:
+                break
+
+    def feed_limiter(self, limiter):
+        """Report every call to the adaptive concurrency ``limiter`` (None to skip).
+
+        Overloads and missed deadlines, including a primary abandoned for
+        its fallback, count as overloads; other failed calls say nothing
+        about load and are left out.
+        """
+        if limiter is None:
+            return
+        for call in self.calls:
+            error = call['error']
+            if isinstance(error, OllamaOverloadedError):
+                limiter.record_overload(call['started'], str(error))
+            elif error is None and call['result'] is not None:
+                eval_count = call['result'].get('eval_count')
+                eval_duration = call['result'].get('eval_duration')
+                limiter.record_success(call['started'], call['elapsed'], eval_count,
+                                       eval_count / (eval_duration / 1e9) if eval_count and eval_duration else None)
+
+    def attribute_saved(self, saved_count: int) -> List[Tuple[Dict, int]]:
+        """Split ``saved_count`` stored rows over the calls in order, top-ups last"""
+        attributed = []
+        unattributed = saved_count
+        for call in self.calls:
+            call_saved = min(call['parsed'], unattributed)
+            unattributed -= call_saved
+            attributed.append((call, call_saved))
+        return attributed
+
+    def record_call_stats(self, member_id: int, saved_count: int):
+        """Store an ``OllamaCallStat`` per call that reached Ollama (cache hits have no result)"""
+        for call, call_saved in self.attribute_saved(saved_count):
+            if call['result'] is not None:
+                self.generator.record_call_stat(member_id, self.scenario, call['result'], call['parsed'],
+                                                call_saved, self.stream, call['model'])
+
+    def _keep_batch(self, batch: List[Dict]):
+        self._keep(batch)
+        if self._report_batch is not None:
+            self._report_batch(batch)
+
+    def _keep(self, conversations: List[Dict]):
+        for conv in conversations:
+            conv['model'] = self.model
+        self.conversations.extend(conversations)
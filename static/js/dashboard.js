@@ -356,22 +356,110 @@ class HealthcareDashboard {
             const result = await response.json();
 
             if (result.success) {
-                status.innerHTML = `
-                    <p style="color: #22c55e;">✅ Successfully generated ${result.total_conversations} conversations!</p>
-                    <p>Refresh the page to see the new conversations in the dashboard.</p>
-                `;
-            } else {
-                status.innerHTML = `<p style="color: #ef4444;">❌ Error: ${result.error}</p>`;
+                this.pollGenerationJob(result.status_url, result.job_id);
+                return;
             }
+            status.innerHTML = `<p style="color: #ef4444;">❌ Error: ${result.error}</p>`;
         } catch (error) {
             status.innerHTML = `
                 <p style="color: #ef4444;">❌ Error generating conversations: ${error.message}</p>
                 <p style="color: #f59e0b;">⚠️ Make sure Ollama is running on http://localhost:11434</p>
             `;
-        } finally {
+        }
+        this.resetGenerationControls();
+    }
+
+    // Poll a queued generation job until it finishes
+    pollGenerationJob(statusUrl, jobId) {
+        const status = document.getElementById('generationStatus');
+        const cancelBtn = document.getElementById('cancelGenerationBtn');
+
+        if (cancelBtn) {
+            cancelBtn.classList.remove('hidden');
+            cancelBtn.disabled = false;
+            cancelBtn.onclick = () => this.cancelGenerationJob(jobId);
+        }
+
+        const poll = async () => {
+            try {
+                const response = await fetch(statusUrl);
+                const job = await response.json();
+
+                if (!response.ok) {
+                    status.innerHTML = `<p style="color: #ef4444;">❌ Error: ${job.error}</p>`;
+                    this.resetGenerationControls();
+                    return;
+                }
+
+                this.renderGenerationJob(job);
+
+                if (['queued', 'running'].includes(job.status)) {
+                    this.generationPoll = setTimeout(poll, 2000);
+                } else {
+                    this.resetGenerationControls();
+                }
+            } catch (error) {
+                status.innerHTML = `<p style="color: #ef4444;">❌ Error checking generation progress: ${error.message}</p>`;
+                this.resetGenerationControls();
+            }
+        };
+
+        poll();
+    }
+
+    renderGenerationJob(job) {
+        const status = document.getElementById('generationStatus');
+        if (!status) return;
+
+        const icons = { pending: '⏳', running: '🤖', completed: '✅', failed: '❌', cancelled: '⏹️', skipped: '⏭️' };
+        const months = job.months.map(month => `
+            <li>${icons[month.status] || ''} ${month.label}: ${month.messages} messages (${month.status})</li>
+        `).join('');
+
+        let summary = `<p style="color: #1FB8CD;">🤖 Generating conversations... ${job.messages_generated} messages so far (${job.elapsed_seconds}s)</p>`;
+        if (job.status === 'queued') {
+            summary = '<p style="color: #1FB8CD;">⏳ Waiting for an earlier generation job to finish...</p>';
+        } else if (job.status === 'completed') {
+            summary = `
+                <p style="color: #22c55e;">✅ Successfully generated ${job.messages_generated} conversations in ${job.elapsed_seconds}s!</p>
+                <p>Refresh the page to see the new conversations in the dashboard.</p>
+            `;
+        } else if (job.status === 'cancelled') {
+            summary = `<p style="color: #f59e0b;">⏹️ Generation cancelled after ${job.messages_generated} messages.</p>`;
+        } else if (job.status === 'failed') {
+            summary = `
+                <p style="color: #ef4444;">❌ Error: ${job.error}</p>
+                <p style="color: #f59e0b;">⚠️ Make sure Ollama is running on http://localhost:11434</p>
+            `;
+        }
+
+        status.innerHTML = `${summary}<ul>${months}</ul>`;
+    }
+
+    async cancelGenerationJob(jobId) {
+        const cancelBtn = document.getElementById('cancelGenerationBtn');
+        if (cancelBtn) {
+            cancelBtn.disabled = true;
+        }
+
+        try {
+            await fetch(`/api/generation-jobs/${jobId}/cancel`, { method: 'POST' });
+        } catch (error) {
+            console.error('Error cancelling generation job:', error);
+        }
+    }
+
+    resetGenerationControls() {
+        const btn = document.getElementById('generateConversationsBtn');
+        const cancelBtn = document.getElementById('cancelGenerationBtn');
+
+        if (btn) {
             btn.disabled = false;
             btn.textContent = 'Generate Conversations';
         }
+        if (cancelBtn) {
+            cancelBtn.classList.add('hidden');
+        }
     }
 }
 
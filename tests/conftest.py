@@ -0,0 +1,77 @@
+import contextlib
+import io
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+
+SEEDED_MESSAGES_PER_MEMBER = 300
+
+
+def seed_conversations(member_ids, per_member=SEEDED_MESSAGES_PER_MEMBER):
+    """Bulk-insert ``per_member`` messages per member, spread over the team and eight months"""
+    from models import db, TeamMember, Conversation
+
+    team = TeamMember.query.order_by(TeamMember.id).all()
+    rows = []
+    for member_id in member_ids:
+        timestamp = datetime(2025, 1, 1, 8, 0)
+        for i in range(per_member):
+            timestamp += timedelta(hours=19)
+            team_member = team[i % len(team)] if i % 3 else None
+            sender = team_member.name if team_member else 'Rohan Patel'
+            message = f"Check-in {i} for member {member_id}"
+            rows.append({
+                'member_id': member_id, 'team_member_id': team_member.id if team_member else None,
+                'sender': sender, 'message': message, 'category': 'general', 'timestamp': timestamp,
+                'month': min(timestamp.month, 8),
+                'content_hash': Conversation.compute_content_hash(member_id, timestamp, sender, message)
+            })
+    db.session.execute(Conversation.__table__.insert(), rows)
+    db.session.commit()
+
+
+@pytest.fixture(scope='session')
+def app():
+    """App on an in-memory SQLite database: the sample data plus two members' conversations"""
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    from app import create_app
+    from database import create_synthetic_members
+    from member_stats import rebuild_member_stats
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app()
+    with app.app_context():
+        create_synthetic_members(1)
+        seed_conversations([1, 2])
+        rebuild_member_stats()
+    return app
+
+
+@pytest.fixture
+def stubs():
+    """Start Ollama stub servers (two-message transcripts unless overridden), shut down after the test"""
+    from ollama_stub import start_stub_server
+
+    servers = []
+
+    def start(**options):
+        server = start_stub_server(**{'messages': 2, **options})
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        yield app.test_client()
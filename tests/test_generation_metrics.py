@@ -0,0 +1,40 @@
+from conversation_generator import ElyxConversationGenerator
+from generation_metrics import summarize_calls
+from models import db, OllamaCallStat
+
+
+def test_partial_stream_is_timed(stubs):
+    stub = stubs(latency=0.05, tokens_per_second=400, messages=10)
+    generator = ElyxConversationGenerator(base_url=stub.base_url, use_cache=False)
+
+    chunks = generator.call_ollama_stream('Month 1 check-in')
+    received = [next(chunks) for _ in range(20)]
+    chunks.close()
+    partial = generator.pop_last_response()
+
+    assert partial['done'] is False and partial['eval_count'] == len(received)
+    assert partial['prompt_eval_duration'] >= 0.05e9
+    assert 0 < partial['eval_duration'] < partial['total_duration']
+    assert generator.prompt_eval_stats['calls'] == 1
+
+
+def test_rates_and_averages_skip_rows_without_durations(app):
+    with app.app_context():
+        db.session.add_all([
+            OllamaCallStat(scenario='metrics_check', model='metrics:test', eval_count=100,
+                           eval_duration=int(2e9), prompt_eval_count=50, prompt_eval_duration=int(0.2e9),
+                           total_duration=int(3e9), messages_parsed=10),
+            # A partial stream recorded without durations
+            OllamaCallStat(scenario='metrics_check', model='metrics:test', eval_count=40, messages_parsed=2)
+        ])
+        db.session.commit()
+        try:
+            summary = next(row for row in summarize_calls('model') if row['model'] == 'metrics:test')
+        finally:
+            OllamaCallStat.query.filter_by(model='metrics:test').delete()
+            db.session.commit()
+
+    assert summary['calls'] == 2 and summary['eval_tokens'] == 140
+    assert summary['tokens_per_second'] == 50.0
+    assert summary['avg_prompt_eval_ms'] == 200.0
+    assert summary['avg_total_seconds'] == 3.0
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from ollama_client import CircuitBreaker, OllamaClient, OllamaDeadlineError, OllamaError
+
+MODEL = 'llama3.1:8b'
+
+
+def open_circuit(client, reset_timeout=0.05):
+    """Trip the client's breaker and wait out the cool-down, so the next call is the probe"""
+    client.circuit = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+    client.circuit.record_failure()
+    time.sleep(reset_timeout * 2)
+    return client.circuit.opened_at
+
+
+def test_probe_that_misses_its_deadline_releases_the_circuit(stubs):
+    stub = stubs(latency=0.5)
+    client = OllamaClient(stub.base_url, max_retries=0)
+    opened_at = open_circuit(client)
+
+    with pytest.raises(OllamaDeadlineError):
+        list(client.generate_stream(MODEL, 'Month 1 check-in', deadline=time.monotonic() + 0.1))
+
+    assert client.circuit.state == 'open'
+    assert client.circuit.opened_at == opened_at
+    assert client.circuit.failures == 1
+
+    # The cool-down already ran out, so the next call probes and closes the circuit
+    stub.latency = 0.0
+    chunks = list(client.generate_stream(MODEL, 'Month 1 check-in'))
+    assert chunks[-1]['done']
+    assert client.circuit.state == 'closed'
+
+
+def test_probe_failure_reopens_the_circuit(stubs):
+    stub = stubs()
+    client = OllamaClient(stub.base_url, max_retries=0)
+    opened_at = open_circuit(client)
+    stub.shutdown()
+    stub.server_close()
+
+    with pytest.raises(OllamaError):
+        client.generate(MODEL, 'Month 1 check-in')
+
+    assert client.circuit.state == 'open'
+    assert client.circuit.opened_at > opened_at
+
+
+def test_release_probe_leaves_other_threads_probe_alone():
+    circuit = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    circuit.record_failure()
+    assert circuit.allow()
+
+    releaser = threading.Thread(target=circuit.release_probe)
+    releaser.start()
+    releaser.join()
+
+    assert circuit.state == 'half_open'
@@ -0,0 +1,64 @@
+import socket
+
+import pytest
+
+from ollama_client import OllamaEndpointPool
+
+MODEL = 'llama3.1:8b'
+
+
+@pytest.fixture
+def dead_url():
+    """A local port with nothing listening, so connections are refused"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_pool_routes_to_the_least_loaded_endpoint(stubs):
+    slow = stubs(tokens_per_second=500)
+    fast = stubs(tokens_per_second=5000)
+    pool = OllamaEndpointPool([slow.base_url, fast.base_url])
+
+    # Unmeasured endpoints are tried first, so each gets one call
+    for i in range(2):
+        pool.generate(MODEL, f"Month {i + 1} check-in")
+    assert (slow.request_count, fast.request_count) == (1, 1)
+
+    for i in range(3):
+        pool.generate(MODEL, f"Month {i + 3} check-in")
+    assert (slow.request_count, fast.request_count) == (1, 4)
+    rates = {endpoint['base_url']: endpoint['tokens_per_second'] for endpoint in pool.stats()}
+    assert rates[fast.base_url] > rates[slow.base_url]
+
+
+def test_pool_ejects_a_failing_endpoint_and_fails_over(stubs, dead_url):
+    stub = stubs()
+    pool = OllamaEndpointPool([dead_url, stub.base_url], eject_seconds=60)
+
+    result = pool.generate(MODEL, 'Month 1 check-in')
+
+    assert result['response']
+    assert stub.request_count == 1
+    dead, alive = pool.stats()
+    assert not dead['healthy'] and dead['failures'] == 1 and dead['last_error']
+    assert alive['healthy'] and alive['failures'] == 0
+
+    # An ejected endpoint gets no calls until its ejection runs out
+    pool.generate(MODEL, 'Month 2 check-in')
+    dead, alive = pool.stats()
+    assert (dead['requests'], alive['requests']) == (1, 2)
+    assert all(endpoint['in_flight'] == 0 for endpoint in pool.stats())
+
+
+def test_pool_fails_over_a_stream_before_the_first_chunk(stubs, dead_url):
+    stub = stubs()
+    pool = OllamaEndpointPool([dead_url, stub.base_url], eject_seconds=60)
+
+    chunks = list(pool.generate_stream(MODEL, 'Month 1 check-in'))
+
+    assert chunks[-1]['done'] and ''.join(chunk['response'] for chunk in chunks)
+    dead, alive = pool.stats()
+    assert not dead['healthy'] and alive['healthy']
+    assert all(endpoint['in_flight'] == 0 for endpoint in pool.stats())
@@ -0,0 +1,16 @@
+from query_checks import count_page_queries
+
+
+def test_member_conversation_page_takes_two_queries(client):
+    messages, statements = count_page_queries(client, member_id=1, limit=500)
+
+    assert messages == 300
+    # The member lookup and the joined page; one more per message is an N+1
+    assert len(statements) <= 2, statements
+
+
+def test_query_count_does_not_grow_with_page_size(client):
+    _, small_page = count_page_queries(client, member_id=1, limit=10)
+    _, large_page = count_page_queries(client, member_id=1, limit=300)
+
+    assert len(large_page) == len(small_page)
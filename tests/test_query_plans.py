@@ -0,0 +1,16 @@
+from query_checks import check_query_plans
+
+
+def test_endpoint_queries_are_index_backed(client):
+    results = check_query_plans(client, member_id=1)
+
+    assert results
+    failing = {result['statement']: result['plan'] for result in results if result['problems']}
+    assert not failing
+
+
+def test_per_member_queries_are_checked(client):
+    statements = [result['statement'] for result in check_query_plans(client, member_id=2)]
+
+    for table in ('conversations', 'timeline_events', 'health_metrics', 'decisions'):
+        assert any(f'FROM {table}' in statement and 'WHERE' in statement for statement in statements), table
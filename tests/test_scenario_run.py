@@ -0,0 +1,89 @@
+from config import Config
+from conversation_generator import ElyxConversationGenerator
+from models import db, OllamaCallStat
+from ollama_client import OllamaDeadlineError
+from scenario_run import ScenarioRun
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.successes = []
+        self.overloads = []
+
+    def record_success(self, started, elapsed, eval_count, tokens_per_second):
+        self.successes.append(eval_count)
+
+    def record_overload(self, started, reason):
+        self.overloads.append(reason)
+
+
+def make_run(stub, stream=False, min_messages=None, max_messages=None, **route):
+    generator = ElyxConversationGenerator(base_url=stub.base_url, use_cache=False)
+    scenario = generator.get_scenarios(keys=['onboarding'])[0]
+    scenario['prompt'] = scenario['build_prompt']()
+    scenario['route'] = dict({'model': generator.model, 'latency_budget': None, 'fallback': None}, **route)
+    scenario['min_messages'] = min_messages or scenario['min_messages']
+    scenario['max_messages'] = max_messages or scenario['max_messages']
+    return ScenarioRun(generator, scenario, stream)
+
+
+def test_short_response_gets_topped_up(stubs, monkeypatch):
+    monkeypatch.setattr(Config, 'GENERATION_MAX_TOP_UPS', 2)
+    stub = stubs(messages=5)
+    run = make_run(stub, min_messages=8, max_messages=10)
+
+    conversations = run.run()
+
+    assert len(conversations) == 10
+    assert stub.request_count == 2
+    assert [call['parsed'] for call in run.calls] == [5, 5]
+    assert all(call['error'] is None and call['result']['done'] for call in run.calls)
+
+
+def test_top_ups_stop_at_the_limit(stubs, monkeypatch):
+    monkeypatch.setattr(Config, 'GENERATION_MAX_TOP_UPS', 1)
+    stub = stubs(messages=2)
+    run = make_run(stub, min_messages=8, max_messages=10)
+
+    assert len(run.run()) == 4
+    assert stub.request_count == 2
+
+
+def test_slow_primary_falls_back_and_counts_as_overload(stubs, monkeypatch):
+    monkeypatch.setattr(Config, 'GENERATION_MAX_TOP_UPS', 0)
+    stub = stubs(messages=5, latency=0.3)
+    run = make_run(stub, stream=True, latency_budget=0.1, fallback='fallback:small')
+    batches = []
+
+    conversations = run.run(batches.extend)
+
+    assert len(conversations) == 5 and batches == conversations
+    assert {conv['model'] for conv in conversations} == {'fallback:small'}
+    primary, fallback = run.calls
+    assert isinstance(primary['error'], OllamaDeadlineError) and primary['parsed'] == 0
+    assert fallback['model'] == 'fallback:small' and fallback['error'] is None
+
+    limiter = RecordingLimiter()
+    run.feed_limiter(limiter)
+    assert len(limiter.overloads) == 1
+    assert limiter.successes == [fallback['result']['eval_count']]
+
+
+def test_saved_rows_are_attributed_to_calls_in_order(app, stubs, monkeypatch):
+    monkeypatch.setattr(Config, 'GENERATION_MAX_TOP_UPS', 2)
+    stub = stubs(messages=5)
+    run = make_run(stub, min_messages=8, max_messages=10)
+    run.run()
+
+    # Two of the top-up's messages were duplicates of stored rows
+    assert [saved for _, saved in run.attribute_saved(8)] == [5, 3]
+
+    with app.app_context():
+        run.record_call_stats(member_id=1, saved_count=8)
+        rows = OllamaCallStat.query.filter_by(scenario='onboarding').order_by(OllamaCallStat.id).all()
+        try:
+            assert [(row.messages_parsed, row.messages_saved) for row in rows] == [(5, 5), (5, 3)]
+            assert all(row.eval_count and row.total_duration is not None for row in rows)
+        finally:
+            OllamaCallStat.query.filter_by(scenario='onboarding').delete()
+            db.session.commit()
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from models import db, Conversation
+
+
+def test_snippets_are_escaped_before_highlighting(client):
+    timestamp = datetime(2025, 9, 1, 8, 0)
+    message = 'Zonulin <img src=x onerror=alert(1)> & cortisol results are back'
+    conv = Conversation(member_id=1, sender='Dr. Warren', message=message, category='medical',
+                        timestamp=timestamp, month=8,
+                        content_hash=Conversation.compute_content_hash(1, timestamp, 'Dr. Warren', message))
+    db.session.add(conv)
+    db.session.commit()
+    try:
+        results = client.get('/api/search-conversations?q=zonulin').get_json()
+    finally:
+        db.session.delete(conv)
+        db.session.commit()
+
+    assert [result['id'] for result in results] == [conv.id]
+    snippet = results[0]['snippet']
+    assert snippet.startswith('<mark>Zonulin</mark> &lt;img src=x onerror=alert(1)&gt; &amp; cortisol')
+    assert '<img' not in snippet
@@ -0,0 +1,178 @@
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from models import db, HealthMetric, chunked
+
+# Per-metric shape of a member's journey: starting level, change over the
+# whole period, weekly swing, day-to-day noise, slow drift, relative change
+# at the bottom of an illness dip, and the physiological range.
+METRIC_PROFILES = {
+    'hrv': {
+        'baseline': 35.0, 'baseline_sd': 8.0, 'trend': 13.0, 'weekly': 3.0, 'diurnal': 6.0,
+        'noise': 4.0, 'drift': 3.0, 'illness': -0.45, 'low': 8.0, 'high': 150.0, 'decimals': 1
+    },
+    'recovery_score': {
+        'baseline': 45.0, 'baseline_sd': 8.0, 'trend': 35.0, 'weekly': 6.0, 'diurnal': 0.0,
+        'noise': 8.0, 'drift': 4.0, 'illness': -0.9, 'low': 1.0, 'high': 100.0, 'decimals': 0
+    },
+    'resting_heart_rate': {
+        'baseline': 68.0, 'baseline_sd': 5.0, 'trend': -8.0, 'weekly': 1.5, 'diurnal': 4.0,
+        'noise': 1.5, 'drift': 1.5, 'illness': 0.18, 'low': 38.0, 'high': 120.0, 'decimals': 0
+    },
+}
+
+# The May viral infection from the member's story: onset and days to recover
+DEFAULT_ILLNESS_EPISODES = [(date(2025, 5, 2), 6)]
+
+
+def generate_series(members: int, start: date = date(2025, 1, 1), days: int = 243,
+                    samples_per_day: int = 1, metrics: Iterable[str] = None,
+                    illness_episodes: Sequence[Tuple[date, int]] = None,
+                    random_illness_per_member: float = 0.0,
+                    seed: int = None) -> Dict[str, np.ndarray]:
+    """Synthetic wearable series for ``members`` members, computed as whole arrays.
+
+    Each member gets their own baseline, trend strength, weekly phase and
+    slow random-walk drift on top of the metric profile, plus Gaussian
+    noise. Every ``illness_episodes`` entry (onset date, days) dips all
+    members at once, with a sharp drop and exponential recovery; members
+    also get Poisson(``random_illness_per_member``) episodes of their own.
+    With ``samples_per_day`` above 1 a diurnal cycle is added.
+
+    Returns ``timestamps`` (``datetime64[m]``, one per sample) and one
+    ``(members, samples)`` float array per metric.
+    """
+    rng = np.random.default_rng(seed)
+    metrics = list(metrics or METRIC_PROFILES)
+    illness_episodes = DEFAULT_ILLNESS_EPISODES if illness_episodes is None else illness_episodes
+    samples = days * samples_per_day
+
+    # Time axis in days since start, shape (samples,)
+    t = np.arange(samples) / samples_per_day
+    timestamps = np.datetime64(start, 'm') + np.round(t * 24 * 60).astype('timedelta64[m]')
+    weekday = (np.datetime64(start, 'D').astype(np.int64) + 3 + np.floor(t)) % 7  # 1970-01-01 was a Thursday
+    progress = t / max(days - 1, 1)
+    hour = (t % 1) * 24
+
+    illness = _illness_curve(rng, members, t, start, days, illness_episodes, random_illness_per_member)
+
+    series = {'timestamps': timestamps}
+    for metric in metrics:
+        profile = METRIC_PROFILES[metric]
+        baseline = profile['baseline'] + rng.normal(0, profile['baseline_sd'], (members, 1))
+        trend = profile['trend'] * rng.uniform(0.5, 1.5, (members, 1)) * progress
+        phase = rng.uniform(0, 2 * np.pi, (members, 1))
+        weekly = profile['weekly'] * np.sin(2 * np.pi * weekday / 7 + phase)
+        drift = profile['drift'] * np.cumsum(rng.normal(0, 1, (members, samples)), axis=1) / np.sqrt(samples)
+        noise = rng.normal(0, profile['noise'], (members, samples))
+
+        values = baseline + trend + weekly + drift + noise
+        if samples_per_day > 1 and profile['diurnal']:
+            # Overnight high for HRV, overnight low for heart rate
+            sign = -1.0 if profile['illness'] > 0 else 1.0
+            values += sign * profile['diurnal'] * np.cos(2 * np.pi * (hour - 3) / 24)
+        values *= 1 + profile['illness'] * illness
+        series[metric] = np.round(np.clip(values, profile['low'], profile['high']), profile['decimals'])
+    return series
+
+
+def _illness_curve(rng, members: int, t: np.ndarray, start: date, days: int,
+                   episodes: Sequence[Tuple[date, int]], random_rate: float) -> np.ndarray:
+    """Illness severity in [0, 1] per member and sample, shape (members, samples)"""
+    onset = np.array([(episode_start - start).days for episode_start, _ in episodes], dtype=float)
+    duration = np.array([episode_days for _, episode_days in episodes], dtype=float)
+    severity = np.broadcast_to(_dip(t, onset, duration).max(axis=0, initial=0.0), (members, t.size))
+
+    if random_rate > 0 and members:
+        counts = rng.poisson(random_rate, members)
+        extra = int(counts.max())
+        if extra:
+            random_onset = rng.uniform(0, days, (members, extra))
+            # Members with fewer episodes get the spare ones pushed past the end
+            random_onset[np.arange(extra)[None, :] >= counts[:, None]] = days + 365
+            random_duration = rng.integers(3, 10, (members, extra)).astype(float)
+            severity = np.maximum(severity, _dip(t, random_onset, random_duration).max(axis=-2))
+    return severity
+
+
+def _dip(t: np.ndarray, onset: np.ndarray, duration: np.ndarray) -> np.ndarray:
+    """A day to hit bottom, then exponential recovery over about ``duration`` days"""
+    since = t - onset[..., None]
+    recovery = np.exp(-np.maximum(since - 1, 0) / (duration[..., None] / 2))
+    return np.where(since < 0, 0.0, np.where(since < 1, since, recovery))
+
+
+def load_health_metrics(series: Dict[str, np.ndarray], member_ids: Sequence[int],
+                        replace: bool = False, batch_size: int = 100_000) -> int:
+    """Bulk insert ``generate_series`` output into ``health_metrics``.
+
+    Rows go through the DB-API ``executemany`` in large batches, bypassing
+    the ORM. With ``replace`` the members' existing metrics in the series'
+    date range are deleted in the same transaction. Returns rows inserted.
+    """
+    metrics = [name for name in series if name != 'timestamps']
+    days = series['timestamps'].astype('datetime64[D]')
+    dialect = db.engine.dialect
+    if dialect.name == 'sqlite':
+        dates = np.datetime_as_string(days, unit='D').tolist()
+    else:
+        dates = days.astype(object).tolist()
+    if dialect.paramstyle not in ('qmark', 'format', 'pyformat'):
+        raise ValueError(f"Unsupported DB-API paramstyle: {dialect.paramstyle}")
+    placeholder = '?' if dialect.paramstyle == 'qmark' else '%s'
+    sql = f"INSERT INTO health_metrics (member_id, metric_type, value, date) VALUES ({', '.join([placeholder] * 4)})"
+
+    connection = db.session.connection()
+    if replace:
+        member_ids = list(member_ids)
+        for chunk in chunked(member_ids):
+            HealthMetric.query.filter(
+                HealthMetric.member_id.in_(chunk),
+                HealthMetric.metric_type.in_(metrics),
+                HealthMetric.date >= days[0].astype(object),
+                HealthMetric.date <= days[-1].astype(object)
+            ).delete(synchronize_session=False)
+
+    cursor = connection.connection.cursor()
+    inserted = 0
+    try:
+        batch = []
+        for metric in metrics:
+            values = series[metric]
+            for row_index, member_id in enumerate(member_ids):
+                batch.extend(zip([member_id] * len(dates), [metric] * len(dates),
+                                 values[row_index].tolist(), dates))
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    inserted += len(batch)
+                    batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            inserted += len(batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        cursor.close()
+    return inserted
+
+
+def seed_wearable_data(member_ids: List[int], start: date = date(2025, 1, 1), days: int = 243,
+                       samples_per_day: int = 1, replace: bool = True,
+                       random_illness_per_member: float = 0.0, seed: int = None) -> int:
+    """Generate and load series for ``member_ids``, printing throughput"""
+    started = time.perf_counter()
+    series = generate_series(len(member_ids), start, days, samples_per_day,
+                             random_illness_per_member=random_illness_per_member, seed=seed)
+    generated = time.perf_counter()
+    rows = load_health_metrics(series, member_ids, replace=replace)
+    loaded = time.perf_counter()
+
+    print(f"📈 Generated {rows:,} wearable readings for {len(member_ids):,} members "
+          f"in {generated - started:.2f}s")
+    print(f"   💾 Loaded at {rows / max(loaded - generated, 1e-9):,.0f} rows/s")
+    return rows